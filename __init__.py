@@ -31,15 +31,18 @@ class Application(html5.Div):
 
 	def startup(self, *args, **kwargs):
 		if conf["core.version"] is None:
+			# Persisted as well, so a warm start doesn't wait for the server before requesting the config
 			network.NetworkService.request(None, "/vi/getVersion",
 			                               successHandler=self.getVersionSuccess,
 			                               failureHandler=self.startupFailure,
-			                               cacheable=True)
+			                               revalidatedHandler=self.getVersionRevalidated,
+			                               cacheable=True, persistent=True)
 		else:
 			network.NetworkService.request(None, "/vi/config",
 			                                successHandler=self.getConfigSuccess,
 											failureHandler=self.startupFailure,
-	                                        cacheable=True)
+			                                revalidatedHandler=self.getConfigRevalidated,
+	                                        cacheable=True, persistent=True)
 
 	def getVersionSuccess(self, req):
 		conf["core.version"] = network.NetworkService.decode(req)
@@ -67,6 +70,10 @@ class Application(html5.Div):
 
 		self.startup()
 
+	def getVersionRevalidated(self, req):
+		# The server has been updated since the persisted version; responses persisted from now on belong to the new one
+		conf["core.version"] = network.NetworkService.decode(req)
+
 	def getConfigSuccess(self, req):
 		conf["mainConfig"] = network.NetworkService.decode(req)
 
@@ -75,6 +82,12 @@ class Application(html5.Div):
 
 		self.adminScreen.invoke()
 
+	def getConfigRevalidated(self, req):
+		# Swap the config in place instead of rebuilding the admin screen the user is working in
+		mainConfig = network.NetworkService.decode(req)
+		conf["mainConfig"].clear()
+		conf["mainConfig"].update(mainConfig)
+
 	def startupFailure(self, req, err):
 		if err in [403, 401]:
 			self.login()
@@ -100,6 +113,8 @@ class Application(html5.Div):
 		if self.loginScreen:
 			self.loginScreen.hide()
 
+		# Drop security keys prefetched within the previous session
+		network.NetworkService.flushSkeyPool()
 		self.startup()
 
 	def logout(self):
@@ -138,5 +153,9 @@ def start():
 	conf["indexeddb"] = utils.indexeddb("vi-cache")
 
 	# Application
-	app = Application()
-	html5.Body().appendChild(app)
+	def startApplication():
+		app = Application()
+		html5.Body().appendChild(app)
+
+	# Load persisted responses first, so a warm start renders before the network answers
+	network.PersistentCache.load(startApplication)
@@ -294,7 +294,7 @@ class SelectRootNode(html5.Select):
 	def update(self):
 		self.removeAllChildren()
 		NetworkService.request(self.parent().parent().module, "listRootNodes",
-		                        successHandler=self.onRootNodesAvailable)
+		                        successHandler=self.onRootNodesAvailable, batchable=True)
 
 	def onRootNodeChanged(self, newNode):
 		for option in self._children:
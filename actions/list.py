@@ -7,6 +7,7 @@ from vi.widgets.edit import EditWidget
 from vi.config import conf
 from vi.pane import Pane
 from vi.widgets.csvexport import ExportCsvStarter
+from vi.widgets.bulkdelete import BulkDelete
 from vi.sidebarwidgets.internalpreview import InternalPreview
 from vi.sidebarwidgets.filterselector import FilterSelector
 from vi.i18n import translate
@@ -234,19 +235,7 @@ class DeleteAction(Button):
 		d.addClass( "delete" )
 
 	def doDelete(self, dialog):
-		deleteList = dialog.deleteList
-		for x in deleteList:
-			NetworkService.request( self.parent().parent().module, "delete", {"key": x},
-									secure=True, modifies=True,
-									successHandler = self.deletedSuccess,
-									failureHandler = self.deletedFailed )
-
-
-	def deletedSuccess( self, req=None, code=None ):
-		conf["mainWindow"].log("success",translate("Eintrag gelöscht"),modul=self.parent().parent().module,action="delete" )
-
-	def deletedFailed( self, req=None, code=None ):
-		conf["mainWindow"].log("error",translate("Eintrag konnte nicht gelöscht werden (status: %s)"%code),modul=self.parent().parent().module,action="delete" )
+		BulkDelete(self.parent().parent().module, [("delete", x) for x in dialog.deleteList])
 
 	def resetLoadingState(self):
 		pass
@@ -428,16 +417,19 @@ class ListPreviewInlineAction(Button):
 		intPrevActive = self.intPrevActive
 		selection = self.parent().parent().getCurrentSelection()
 		if len(selection) == 1 and intPrevActive == True :
-			preview = InternalPreview( self.parent().parent().module, self.parent().parent()._structure, selection[0])
-			self.parent().parent().sideBar.sidebarHeadline.element.innerHTML = translate("vi.sidebar.internalpreview")
-			svg = embedsvg.get("icons-list-item")
-			if svg:
-				self.parent().parent().sideBar.sidebarIcon.element.innerHTML = svg
-			self.parent().parent().sideBar.setWidget(preview)
+			self.parent().parent().requestFullRecord(selection[0], self.showIntPrev)
 		else:
 			if isinstance( self.parent().parent().sideBar.getWidget(), InternalPreview ):
 				self.parent().parent().sideBar.setWidget(None)
 
+	def showIntPrev(self, entry):
+		preview = InternalPreview( self.parent().parent().module, self.parent().parent()._structure, entry)
+		self.parent().parent().sideBar.sidebarHeadline.element.innerHTML = translate("vi.sidebar.internalpreview")
+		svg = embedsvg.get("icons-list-item")
+		if svg:
+			self.parent().parent().sideBar.sidebarIcon.element.innerHTML = svg
+		self.parent().parent().sideBar.setWidget(preview)
+
 	@staticmethod
 	def isSuitableFor( module, handler, actionName ):
 		if module is None or module not in conf["modules"].keys():
@@ -6,6 +6,7 @@ from vi.network import NetworkService
 from vi.pane import Pane
 from vi.priorityqueue import actionDelegateSelector
 from vi.widgets.edit import EditWidget
+from vi.widgets.bulkdelete import BulkDelete
 from vi.framework.components.button import Button
 
 
@@ -225,12 +226,15 @@ class DeleteAction(Button):
 		d.addClass( "delete" )
 
 	def doDelete(self, dialog):
-		deleteList = dialog.deleteList
-		for x in deleteList:
+		entries = []
+
+		for x in dialog.deleteList:
 			if isinstance(x,self.parent().parent().nodeWidget ):
-				NetworkService.request( self.parent().parent().module, "delete/node", {"key": x.data["key"]}, secure=True, modifies=True )
+				entries.append(("delete/node", x.data["key"]))
 			elif isinstance(x,self.parent().parent().leafWidget ):
-				NetworkService.request( self.parent().parent().module, "delete/leaf", {"key": x.data["key"]}, secure=True, modifies=True )
+				entries.append(("delete/leaf", x.data["key"]))
+
+		BulkDelete(self.parent().parent().module, entries)
 
 	def resetLoadingState(self):
 		pass
@@ -285,7 +289,7 @@ class SelectRootNode( html5.Select ):
 		self.removeAllChildren()
 		NetworkService.request( self.parent().parent().module, "listRootNodes",
 		                            successHandler=self.onRootNodesAvailable,
-		                                cacheable=True )
+		                                cacheable=True, batchable=True )
 
 	def onRootNodeChanged(self, newNode):
 		for option in self._children:
@@ -99,7 +99,8 @@ class AdminScreen(Screen):
 	def getCurrentUser(self):
 		NetworkService.request("user", "view/self",
 							   successHandler=self.getCurrentUserSuccess,
-							   failureHandler=self.getCurrentUserFailure)
+							   failureHandler=self.getCurrentUserFailure,
+							   batchable=True)
 
 	def getCurrentUserSuccess(self, req):
 		answ = NetworkService.decode(req)
@@ -394,6 +394,15 @@ class BaseBone(object):
 		widget.unserialize(value)
 		return widget
 
+	def viewString(self, value=None):
+		"""
+		Returns the plain text representation of value, as shown by viewWidget().
+
+		This allows for rendering the value without instantiating a view widget, e.g. in large tables.
+		Bones which require a rich view widget return None.
+		"""
+		return None
+
 	'''
 	def toString(self, value):
 		return value or conf["emptyValue"]
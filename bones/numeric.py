@@ -191,6 +191,21 @@ class NumericBone(BaseBone):
 	editWidgetFactory = NumericEditWidget
 	viewWidgetFactory = NumericViewWidget
 
+	def viewString(self, value=None):
+		style = (self.boneStructure.get("params") or {}).get("style", "")
+
+		# Currency formatting is done by the view widget
+		if self.multiple or self.languages or "currency" in style.lower():
+			return None
+
+		if value is None:
+			return conf["emptyValue"]
+
+		if self.boneStructure.get("precision"):
+			return str(html5.utils.parseFloat(value or 0))
+
+		return str(html5.utils.parseInt(value or 0))
+
 	@staticmethod
 	def checkFor(moduleName, boneName, skelStructure):
 		return skelStructure[boneName]["type"] == "numeric" or skelStructure[boneName]["type"].startswith("numeric.")
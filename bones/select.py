@@ -131,6 +131,12 @@ class SelectMultipleBone(BaseBone):
 		super().__init__(moduleName, boneName, skelStructure)
 		self.valuesDict = {k: v for k, v in self.boneStructure["values"]}  #fixme this could be obsolete when core renders dict...
 
+	def viewString(self, value=None):
+		if self.multiple or self.languages:
+			return None
+
+		return str(self.valuesDict.get(value, value) if value else conf["emptyValue"])
+
 	@staticmethod
 	def checkFor(moduleName, boneName, skelStructure):
 		return (skelStructure[boneName]["type"] == "select" or skelStructure[boneName]["type"].startswith("select.")) \
@@ -61,6 +61,12 @@ class StringBone(BaseBone):
 	editWidgetFactory = StringEditWidget
 	viewWidgetFactory = StringViewWidget
 
+	def viewString(self, value=None):
+		if self.multiple or self.languages:
+			return None
+
+		return html5.utils.unescape(value or conf["emptyValue"])
+
 	@staticmethod
 	def checkFor(moduleName, boneName, skelStructure):
 		return skelStructure[boneName]["type"] == "str" or skelStructure[boneName]["type"].startswith("str.")
@@ -62,11 +62,20 @@ conf = {
 	"initialHashEvent": EventDispatcher("initialHash"),
 
 	# Actions in the top level bar
-    "toplevelactions": ["log", "tasks", "userstate", "logout"],
+    "toplevelactions": ["log", "tasks", "userstate", "clearcache", "logout"],
 
 	# Number of rows to fetch in list widgets
 	"batchSize": 30,
 
+	# Number of concurrent requests for bulk operations like deleting many entries
+	"bulkConcurrency": 5,
+
+	# Keep only the shown columns of list rows in memory; can be set per module by "compactModel"
+	"compactListModel": False,
+
+	# Render only the visible items of tree browser levels; can be set per module by "virtualTree"
+	"virtualTreeLevels": False,
+
 	# Show bone names instead of description
 	"showBoneNames": False,
 
@@ -89,6 +98,9 @@ conf = {
 		}
 	),
 
+	# Max number of compiled logic expressions kept by utils.LogicCache
+	"logicCacheSize": 500,
+
 	# Cached selector widgets on relationalBones for re-use
 	"selectors": {},
 
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import itertools
+from collections import OrderedDict
+
 from ... import html5
 from ... import framework
 from ..event import EventDispatcher
@@ -42,7 +45,9 @@ class SelectTable( html5.ignite.Table ):
 
 		self["tabindex"] = 1
 
-		self._selectedRows = [] # List of row-indexes currently selected
+		self._selectedRows = set() # Set of row-indexes currently selected
+		self._selectionBatch = 0 # Nesting level of beginSelection() calls
+		self._selectionDirty = False # Selection changed during the current gesture
 		self._currentRow = None # Rowindex of the cursor row
 		self._isMouseDown = False # Tracks status of the left mouse button
 		self._isCtlPressed = False # Tracks status of the ctrl key
@@ -163,13 +168,24 @@ class SelectTable( html5.ignite.Table ):
 		if tr is None:
 			return
 
+		self.beginSelection()
+		try:
+			self._onRowMouseDown(event, tr)
+		finally:
+			self.endSelection()
+
+		self.focus()
+
+	def _onRowMouseDown(self, event, tr):
 		row = self.getIndexByTr( tr )
 
 		if self._isCtlPressed:
 			print("GGGGG")
 			if row in self._selectedRows:
 				for x in self._selectedRows:
-					self.getTrByIndex(x).removeClass("is-focused") # remove focus
+					tr = self.getTrByIndex(x)
+					if tr:
+						tr.removeClass("is-focused") # remove focus
 				self.removeSelectedRow( row )
 			else:
 				self.addSelectedRow( row )
@@ -178,9 +194,7 @@ class SelectTable( html5.ignite.Table ):
 
 		elif self._isShiftPressed:
 
-			self.unSelectAll()
-			for i in ( range(self._ctlStartRow, row+1) if self._ctlStartRow <= row else range(row, self._ctlStartRow+1) ):
-				self.addSelectedRow( i )
+			self.setSelection( range(self._ctlStartRow, row+1) if self._ctlStartRow <= row else range(row, self._ctlStartRow+1) )
 			#self.setCursorRow(row, False) # set focus
 			event.preventDefault()
 
@@ -201,8 +215,6 @@ class SelectTable( html5.ignite.Table ):
 
 			self.setCursorRow(self.getIndexByTr(tr), removeExistingSelection=not self.checkboxes)
 
-		self.focus()
-
 	def onMouseOut(self, event):
 		self._isMouseDown = False
 
@@ -210,6 +222,13 @@ class SelectTable( html5.ignite.Table ):
 		self._isMouseDown = False
 
 	def onKeyDown(self, event):
+		self.beginSelection()
+		try:
+			self._onKeyDown(event)
+		finally:
+			self.endSelection()
+
+	def _onKeyDown(self, event):
 
 		if html5.isArrowDown(event):  # Arrow down
 
@@ -257,7 +276,7 @@ class SelectTable( html5.ignite.Table ):
 		elif html5.isReturn(event):  # Return
 
 			if len(self._selectedRows) > 0:
-				self.selectionActivatedEvent.fire(self, self._selectedRows)
+				self.selectionActivatedEvent.fire(self, sorted(self._selectedRows))
 				event.preventDefault()
 				return
 
@@ -275,7 +294,7 @@ class SelectTable( html5.ignite.Table ):
 		elif html5.isShift(event):  # Shift
 			self._isShiftPressed = True
 			try:
-				self._ctlStartRow = self._currentRow or self._selectedRows[0] or 0
+				self._ctlStartRow = self._currentRow or min(self._selectedRows) or 0
 			except:
 				self._ctlStartRow = 0
 
@@ -286,8 +305,7 @@ class SelectTable( html5.ignite.Table ):
 
 			# leave selection mode if there is only one row selected and return to normal focus
 			if len(self._selectedRows) == 1:
-				for row in self.getCurrentSelection():
-					self.removeSelectedRow(row)
+				self.setSelection( [] )
 
 		elif html5.isShift(event):
 			self._isShiftPressed = False
@@ -298,23 +316,84 @@ class SelectTable( html5.ignite.Table ):
 			self.selectionActivatedEvent.fire( self, [self._currentRow] )
 		event.preventDefault()
 
-	def addSelectedRow(self, row):
+	def beginSelection(self):
 		"""
-			Marks a row as selected
+			Starts a selection gesture.
+			Until the matching endSelection() call, selection changes are collected
+			and announced by one selectionChanged event afterwards.
 		"""
+		self._selectionBatch += 1
 
-		if row in self._selectedRows:
-			return
+	def endSelection(self):
+		"""
+			Ends a selection gesture started by beginSelection().
+		"""
+		self._selectionBatch -= 1
 
-		self._selectedRows.append( row )
+		if not self._selectionBatch and self._selectionDirty:
+			self._selectionDirty = False
+			self.selectionChangedEvent.fire(self, self.getCurrentSelection())
 
-		tr = self.getTrByIndex( row )
-		tr.addClass("is-focused")
+	def _selectionChanged(self):
+		if self._selectionBatch:
+			self._selectionDirty = True
+		else:
+			self.selectionChangedEvent.fire(self, self.getCurrentSelection())
+
+	def _updateRowStates(self, rows):
+		"""
+			Applies the selection state of 'rows' to their row elements and checkboxes.
+		"""
+		if len(rows) == 1:
+			for row in rows:
+				tr = self.getTrByIndex(row)
+				if tr:
+					if row in self._selectedRows:
+						tr.addClass("is-focused")
+					else:
+						tr.removeClass("is-focused")
+		else:
+			# Walk the row elements once instead of looking up every single row
+			idx = 0
+			for tr in self.body._children:
+				if idx in rows:
+					if idx in self._selectedRows:
+						tr.addClass("is-focused")
+					else:
+						tr.removeClass("is-focused")
+
+				idx += tr["rowspan"]
 
 		if self.checkboxes:
-			self._checkboxes[ row ][ "checked" ] = True
+			for row in rows:
+				if row in self._checkboxes:
+					self._checkboxes[ row ][ "checked" ] = row in self._selectedRows
+
+	def setSelection(self, rows):
+		"""
+			Replaces the current selection by 'rows' in one pass.
+			Only rows changing their state are updated, and one selectionChanged event is fired.
+			:param rows: Iterable of row numbers
+		"""
+		rows = set(rows)
+		changed = rows ^ self._selectedRows
+		self._selectedRows = rows
+
+		if changed:
+			self._updateRowStates(changed)
+			self._selectionChanged()
+
+	def addSelectedRow(self, row):
+		"""
+			Marks a row as selected
+		"""
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		if row in self._selectedRows:
+			return
+
+		self._selectedRows.add( row )
+		self._updateRowStates( { row } )
+		self._selectionChanged()
 
 	def removeSelectedRow(self, row):
 		"""
@@ -326,14 +405,8 @@ class SelectTable( html5.ignite.Table ):
 			return
 
 		self._selectedRows.remove( row )
-
-		tr = self.getTrByIndex( row )
-		tr.removeClass("is-focused")
-
-		if self.checkboxes:
-			self._checkboxes[ row ][ "checked" ] = False
-
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self._updateRowStates( { row } )
+		self._selectionChanged()
 
 	def selectRow(self, newRow ):
 		"""
@@ -342,18 +415,11 @@ class SelectTable( html5.ignite.Table ):
 			:param newRow: Number of the row to select
 			:type newRow: int
 		"""
+		self.beginSelection()
 		self.setCursorRow( newRow )
-
-		for row in self._selectedRows[:]:
-			if row!=newRow:
-				self.removeSelectedRow( row )
-
-		if not newRow in self._selectedRows:
-			self._selectedRows.append( newRow )
-			tr = self.getTrByIndex( newRow )
-			tr.addClass("is-focused")
-
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self.setSelection( [ newRow ] )
+		self._selectionChanged()
+		self.endSelection()
 
 	def setCursorRow(self, row, removeExistingSelection=True ):
 		"""
@@ -361,17 +427,23 @@ class SelectTable( html5.ignite.Table ):
 			If removeExistingSelection is True, the current selection (if any) is invalidated.
 		"""
 		if self._currentRow is not None:
-			self.getTrByIndex(self._currentRow).removeClass("is-focused")
+			tr = self.getTrByIndex(self._currentRow)
+			if tr:
+				tr.removeClass("is-focused")
 
 		self._currentRow = row
 		if self._currentRow is not None:
-			self.getTrByIndex(self._currentRow).addClass("is-focused")
 			self.cursorMovedEvent.fire( self, row )
 
+			tr = self.getTrByIndex(self._currentRow)
+			if tr:
+				tr.addClass("is-focused")
+
 		if removeExistingSelection:
-			for row in self._selectedRows[:]:
-				self.removeSelectedRow( row )
-			self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+			self.beginSelection()
+			self.setSelection( [] )
+			self._selectionChanged() # The cursor row is the selection now
+			self.endSelection()
 
 		DeferredCall(self.focusRow, row)
 
@@ -385,7 +457,7 @@ class SelectTable( html5.ignite.Table ):
 			:returns: list
 		"""
 		if self._selectedRows:
-			return self._selectedRows[:]
+			return sorted( self._selectedRows )
 		elif self._currentRow is not None:
 			return [self._currentRow]
 
@@ -397,7 +469,7 @@ class SelectTable( html5.ignite.Table ):
 		"""
 		super(SelectTable, self).clear()
 		self._currentRow = None
-		self._selectedRows = []
+		self._selectedRows = set()
 
 		self.selectionChangedEvent.fire(self, self.getCurrentSelection())
 		self.tableChangedEvent.fire(self, self.getRowCount())
@@ -466,18 +538,7 @@ class SelectTable( html5.ignite.Table ):
 		"""
 		Selects all entries of the table.
 		"""
-		self._selectedRows = range(0, self.getRowCount() )
-
-		for row in self._selectedRows:
-			tr = self.getTrByIndex( row )
-
-			if not "is-focused" in tr["class"]:
-				tr.addClass("is-focused")
-
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = True
-
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self.setSelection( range(0, self.getRowCount() ) )
 		return len(self._selectedRows)
 
 	def unSelectAll(self):
@@ -485,57 +546,285 @@ class SelectTable( html5.ignite.Table ):
 		Unselects all entries of the table.
 		"""
 		unsel = len(self._selectedRows)
-
-		for row in self._selectedRows:
-			tr = self.getTrByIndex( row )
-			tr.removeClass("is-focused")
-
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = False
-
-		self._selectedRows = []
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self.setSelection( [] )
 		return unsel
 
 	def invertSelection(self):
 		"""
 		Inverts the current selection on the whole table currently displayed.
 		"""
-		current = self._selectedRows[:]
-		self._selectedRows = []
+		current = self._selectedRows
+		self.setSelection( set( range(0, self.getRowCount() ) ) - current )
+		return len(self._selectedRows), len(current)
 
-		for row in range(0, self.getRowCount() ):
-			tr = self.getTrByIndex( row )
+class VirtualSelectTable(SelectTable):
+	"""
+		SelectTable working on a recycled window of rows.
 
-			if row in current:
-				tr.removeClass("is-focused")
-			else:
-				self._selectedRows.append(row)
+		Row numbers always refer to positions in the model; only the rows inside the
+		current window starting at _offset are backed by a <tr>. Selection and cursor
+		are therefore kept as row numbers and applied to the window by applyRowStates().
+	"""
+	def __init__(self, *args, **kwargs):
+		super(VirtualSelectTable, self).__init__(*args, **kwargs)
+		self._offset = 0 # Row number of the first row element
+		self._rowCount = 0 # Total number of rows, including those not rendered
+
+	def getTrByIndex(self, idx):
+		slot = idx - self._offset
+
+		if 0 <= slot < len(self.body._children):
+			return self.body._children[slot]
+
+		return None
+
+	def getIndexByTr(self, tr):
+		for slot, c in enumerate(self.body._children):
+			if c.element == tr:
+				return self._offset + slot
+
+		return None
+
+	def getRowCount(self):
+		return self._rowCount
+
+	def applyRowStates(self):
+		"""
+			Applies selection and cursor of the rows currently inside the window to their row elements.
+		"""
+		for slot, tr in enumerate(self.body._children):
+			row = self._offset + slot
+
+			if row in self._selectedRows or row == self._currentRow:
 				tr.addClass("is-focused")
+			else:
+				tr.removeClass("is-focused")
 
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = row in self._selectedRows
+	def _updateRowStates(self, rows):
+		# The window is small, so it is updated as a whole
+		self.applyRowStates()
+
+	def clearRows(self):
+		"""
+			Removes all row elements, but keeps selection and cursor.
+		"""
+		super(SelectTable, self).clear()
+
+	def clear(self):
+		self._rowCount = 0
+		super(VirtualSelectTable, self).clear()
+
+
+class TableModel(object):
+	"""
+		List-like container for the rows of a DataTable.
+
+		Keeps a mapping of each row's _uniqeIndex to its position, so rows can be located
+		in constant time instead of searching the list.
+	"""
+	def __init__(self, rows=None):
+		super(TableModel, self).__init__()
+		self._rows = [] # List of row dicts, in display order
+		self._positions = {} # Map of _uniqeIndex -> position in _rows
+
+		for obj in rows or []:
+			self.append(obj)
+
+	def append(self, obj):
+		"""
+			Appends 'obj', which must provide a _uniqeIndex
+		"""
+		self._positions[obj["_uniqeIndex"]] = len(self._rows)
+		self._rows.append(obj)
+
+	def index(self, obj):
+		"""
+			Returns the position of 'obj'.
+			Raises ValueError if 'obj' is not part of this model.
+		"""
+		try:
+			pos = self._positions[obj["_uniqeIndex"]]
+		except (KeyError, TypeError):
+			raise ValueError("Object is not in model")
+
+		if self._rows[pos] is not obj:
+			raise ValueError("Object is not in model")
+
+		return pos
+
+	def pop(self, pos):
+		"""
+			Removes and returns the row at position 'pos'.
+		"""
+		if pos < 0:
+			pos += len(self._rows)
+
+		obj = self._rows.pop(pos)
+		del self._positions[obj["_uniqeIndex"]]
+
+		for idx in range(pos, len(self._rows)):
+			self._positions[self._rows[idx]["_uniqeIndex"]] = idx
+
+		return obj
+
+	def remove(self, obj):
+		self.pop(self.index(obj))
+
+	def clear(self):
+		self._rows = []
+		self._positions = {}
+
+	def __contains__(self, obj):
+		try:
+			self.index(obj)
+		except ValueError:
+			return False
+
+		return True
+
+	def __getitem__(self, idx):
+		return self._rows[idx]
+
+	def __len__(self):
+		return len(self._rows)
+
+	def __iter__(self):
+		return iter(self._rows)
+
+	def __bool__(self):
+		return bool(self._rows)
+
+
+class ColumnarTableModel(TableModel):
+	"""
+		Compact TableModel storing only the key and the given columns of each row, in one list per column.
+
+		The full records of the most recently added or accessed rows are kept in a bounded cache.
+		All other rows are provided as compact dicts containing only "key", "_uniqeIndex" and the
+		stored columns; such rows are marked by "_compact" and must be refetched if the full record is needed.
+	"""
+	recordCacheSize = 300 # Amount of full records kept
+
+	def __init__(self, columns, rows=None):
+		self._columns = OrderedDict() # Map of column -> list of values
+		for column in ["key"] + [x for x in columns if x != "key"]:
+			self._columns[column] = []
+
+		self._uniqeIndexes = [] # List of _uniqeIndex values, in display order
+		self._records = OrderedDict() # Map of _uniqeIndex -> full record, in LRU order
+
+		super(ColumnarTableModel, self).__init__(rows)
+
+	def hasColumns(self, columns):
+		"""
+			Checks if all of 'columns' are stored by this model.
+		"""
+		return all([x in self._columns for x in columns])
+
+	def _remember(self, obj):
+		self._records[obj["_uniqeIndex"]] = obj
+		self._records.move_to_end(obj["_uniqeIndex"])
+
+		while len(self._records) > self.recordCacheSize:
+			self._records.popitem(last=False)
+
+	def _row(self, pos):
+		uniqeIndex = self._uniqeIndexes[pos]
+
+		obj = self._records.get(uniqeIndex)
+		if obj is not None:
+			self._records.move_to_end(uniqeIndex)
+			return obj
+
+		obj = {column: values[pos] for column, values in self._columns.items()}
+		obj["_uniqeIndex"] = uniqeIndex
+		obj["_compact"] = True
+		return obj
+
+	def append(self, obj):
+		self._positions[obj["_uniqeIndex"]] = len(self._uniqeIndexes)
+		self._uniqeIndexes.append(obj["_uniqeIndex"])
+
+		for column, values in self._columns.items():
+			values.append(obj.get(column))
+
+		self._remember(obj)
+
+	def index(self, obj):
+		try:
+			return self._positions[obj["_uniqeIndex"]]
+		except (KeyError, TypeError):
+			raise ValueError("Object is not in model")
+
+	def pop(self, pos):
+		if pos < 0:
+			pos += len(self._uniqeIndexes)
+
+		obj = self._row(pos)
+
+		uniqeIndex = self._uniqeIndexes.pop(pos)
+		del self._positions[uniqeIndex]
+		self._records.pop(uniqeIndex, None)
+
+		for values in self._columns.values():
+			del values[pos]
+
+		for idx in range(pos, len(self._uniqeIndexes)):
+			self._positions[self._uniqeIndexes[idx]] = idx
+
+		return obj
+
+	def clear(self):
+		for column in self._columns.keys():
+			self._columns[column] = []
+
+		self._uniqeIndexes = []
+		self._positions = {}
+		self._records = OrderedDict()
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return [self._row(pos) for pos in range(*idx.indices(len(self._uniqeIndexes)))]
+
+		return self._row(idx)
+
+	def __len__(self):
+		return len(self._uniqeIndexes)
+
+	def __iter__(self):
+		for pos in range(len(self._uniqeIndexes)):
+			yield self._row(pos)
+
+	def __bool__(self):
+		return bool(self._uniqeIndexes)
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
-		return len(self._selectedRows), len(current)
 
 class DataTable( html5.Div ):
+	selectTableClass = SelectTable # The SelectTable class used for the table
+	lazyCells = True # Instantiate view widgets of cells only for visible rows first
+	pendingChunkSize = 20 # Amount of rows with pending cells rendered at once
+	renderCacheSize = 2000 # Amount of cell strings kept in the render cache
+
+	_renderCache = OrderedDict() # Shared LRU of (bone, value) -> rendered string
 
-	def __init__( self, _loadOnDisplay = False, *args, **kwargs ):
+	def __init__( self, _loadOnDisplay = False, compact = False, *args, **kwargs ):
 		super( DataTable, self ).__init__( )
-		self.table = SelectTable( *args, **kwargs )
+		self.table = self.selectTableClass( *args, **kwargs )
 		self.addClass("vi-datatable")
 		self.appendChild(self.table)
 
 		self._loadOnDisplay = _loadOnDisplay # Load all data content continuously when displaying
+		self._compact = compact # Only keep the shown fields of rows, see ColumnarTableModel
 
-		self._model = [] # List of values we are displaying right now
 		self._shownFields = [] # List of keys we display from the model
+		self._model = self._newModel() # List of values we are displaying right now
 		self._modelIdx = 0 # Internal counter to distinguish between 2 rows with identical data
 		self._isAjaxLoading = False # Determines if we already requested the next batch of rows
 		self._dataProvider = None # Which object to call if we need more data
 		self._cellRender = {} # Map of renders for a given field
 		self._renderedModel = [] #save already rendered Field (used to rebuild Table if new Fields were selected
+		self._pendingCells = {} # Map of _uniqeIndex -> list of cells still waiting for their view widget
+		self._pendingScheduled = False # Determines if rendering of pending cells is already scheduled
 		# We re-emit some events with custom parameters
 		self.selectionChangedEvent = EventDispatcher("selectionChanged")
 		self.selectionActivatedEvent = EventDispatcher("selectionActivated")
@@ -552,6 +841,9 @@ class DataTable( html5.Div ):
 
 		self.cursorMovedEvent.register( self )
 
+		if self.lazyCells:
+			self.sinkEvent("onScroll")
+
 	def setDataProvider(self,obj):
 		"""
 			Register's 'obj' as the provider for this table.
@@ -584,6 +876,25 @@ class DataTable( html5.Div ):
 		elif self.element.scrollTop+self.element.clientHeight<tr.offsetTop:
 			self.element.scrollTop = tr.offsetTop+tr.clientHeight-self.element.clientHeight
 
+	def _newModel(self):
+		"""
+			Creates an empty model, depending on compact mode.
+		"""
+		if self._compact:
+			return ColumnarTableModel(self._shownFields)
+
+		return TableModel()
+
+	def isCompact(self):
+		return self._compact
+
+	def providesFields(self, fields):
+		"""
+			Checks if the rows in the model contain all of 'fields'.
+			This is only not the case for compact models created for other fields.
+		"""
+		return not self._compact or (bool(self._model) and self._model.hasColumns(fields))
+
 	def getRowCount(self):
 		"""
 			Returns the total amount of rows currently known.
@@ -600,6 +911,8 @@ class DataTable( html5.Div ):
 		obj["_uniqeIndex"] = self._modelIdx
 		self._modelIdx += 1
 		self._model.append( obj )
+		if not self._compact:
+			self._renderedModel.append( { } )
 		self._renderObject( obj )
 		self._isAjaxLoading = False
 		if "is-loading" in self.table["class"]:
@@ -613,8 +926,9 @@ class DataTable( html5.Div ):
 		#self.table.prepareGrid(len(objList), len(self._shownFields))
 		self.table.fastGrid(len(objList), len(self._shownFields))
 		for obj in objList:
-			self._renderedModel.append( { } )
 			if writeToModel:
+				if not self._compact:
+					self._renderedModel.append( { } )
 				obj["_uniqeIndex"] = self._modelIdx
 				self._modelIdx += 1
 				self._model.append(obj)
@@ -639,8 +953,10 @@ class DataTable( html5.Div ):
 			assert objOrIndex in self._model, "Cannot remove unknown object from Table"
 			objOrIndex = self._model.index( objOrIndex )
 		if isinstance( objOrIndex, int ):
-			assert objOrIndex>0 and objOrIndex<len(self._model), "Modelindex out of range"
-			self._model.remove( self._model[objOrIndex] )
+			assert objOrIndex>=0 and objOrIndex<len(self._model), "Modelindex out of range"
+			self._pendingCells.pop( self._model.pop( objOrIndex )["_uniqeIndex"], None )
+			if objOrIndex < len(self._renderedModel):
+				del self._renderedModel[objOrIndex]
 			self.table.removeRow( objOrIndex )
 		else:
 			raise TypeError("Expected int or dict, got %s" % str(type(objOrIndex)))
@@ -650,41 +966,160 @@ class DataTable( html5.Div ):
 			Flushes the whole table.
 		"""
 		self.table.clear()
+		self._pendingCells = {}
 		if not keepModel:
-			self._model = []
+			self._model = self._newModel()
+			self._renderedModel = []
+
+	def _renderString(self, render, value):
+		"""
+			Returns the plain string 'render' shows for 'value', or None if a view widget is required.
+			Results are kept in a LRU cache shared by all tables.
+		"""
+		viewString = getattr(render, "viewString", None)
+		if viewString is None:
+			return None
+
+		key = (render.__class__, getattr(render, "moduleName", None), getattr(render, "boneName", None), value)
+
+		try:
+			text = DataTable._renderCache.pop(key)
+		except KeyError:
+			text = viewString(value)
+		except TypeError: # Unhashable values, like lists or dicts
+			return viewString(value)
+
+		DataTable._renderCache[key] = text
+		if len(DataTable._renderCache) > self.renderCacheSize:
+			DataTable._renderCache.popitem(last=False)
+
+		return text
+
+	def _renderCell(self, field, obj, lazy=False):
+		"""
+			Creates the widget for the cell of 'field' in row 'obj'.
+
+			Values with a plain string representation are rendered as text only.
+			If 'lazy' is set, all other values get an empty placeholder first;
+			its view widget is created by _renderPendingCells().
+		"""
+		if field in self._cellRender.keys():
+			render = self._cellRender[field]
+			value = obj.get(field)
+			text = self._renderString(render, value)
+
+			if text is not None:
+				lbl = html5.Div()
+				lbl.addClass("vi-value")
+				lbl.appendChild(html5.TextNode(text))
+			elif lazy:
+				lbl = html5.Div()
+				lbl.pendingRender = (render, value)
+			else:
+				lbl = render.viewWidget(value)
+
+		elif field in obj.keys():
+			lbl = html5.Div(obj[field])
+		else:
+			lbl = html5.Div("...")
+
+		lbl.addClass("ignt-table-content")
+		return lbl
+
+	def _visibleRowRange(self):
+		"""
+			Estimates the rows inside the viewport by the height of the first row.
+		"""
+		rowCount = len(self._model)
+		tr = self.table.getTrByIndex(0) if rowCount else None
+
+		if tr is None or not tr.element.offsetHeight:
+			return range(min(rowCount, self.pendingChunkSize))
+
+		rowHeight = tr.element.offsetHeight
+		first = int(self.element.scrollTop // rowHeight)
+		height = self.element.clientHeight or html5.window.innerHeight
+
+		return range(first, min(rowCount, first + int(height // rowHeight) + 1))
 
-	def _renderObject(self, obj, tableIsPrepared=False, recalculate=True):
+	def _renderPendingRow(self, uniqeIndex):
+		for lbl in self._pendingCells.pop(uniqeIndex, []):
+			render, value = lbl.pendingRender
+			lbl.pendingRender = None
+			lbl.appendChild(render.viewWidget(value))
+
+	def _renderVisibleCells(self):
+		for rowIdx in self._visibleRowRange():
+			self._renderPendingRow(self._model[rowIdx]["_uniqeIndex"])
+
+	def _schedulePendingCells(self):
+		if not self._pendingScheduled:
+			self._pendingScheduled = True
+			DeferredCall(self._renderPendingCells, _delay=0)
+
+	def _renderPendingCells(self):
+		"""
+			Creates the view widgets of pending cells; visible rows first,
+			then the remaining rows chunk by chunk without blocking the browser.
+		"""
+		self._pendingScheduled = False
+		if not self._pendingCells:
+			return
+
+		self._renderVisibleCells()
+
+		# Only the keys of the next chunk are copied, as rendering removes them from _pendingCells
+		for uniqeIndex in list(itertools.islice(self._pendingCells, self.pendingChunkSize)):
+			self._renderPendingRow(uniqeIndex)
+
+		if self._pendingCells:
+			self._pendingScheduled = True
+			DeferredCall(self._renderPendingCells)
+
+	def onScroll(self, event):
+		if self._pendingCells:
+			self._renderVisibleCells()
+
+	def _renderObject(self, obj, tableIsPrepared=False, recalculate=True, rowIdx=None):
 		"""
 			Renders the object to into the table.
 			Does nothing if the list of _shownFields is empty.
 			:param obj: Dictionary of values for this row
 			:type obj: dict
+			:param rowIdx: Position of obj in the model, if already known
+			:type rowIdx: int
 		"""
 		if not self._shownFields:
 			return
 
-		rowIdx = self._model.index(obj)
+		if rowIdx is None:
+			rowIdx = self._model.index(obj)
+
 		cellIdx = 0
 
 		if not tableIsPrepared:
 			self.table.prepareCol( rowIdx, len( self._shownFields ) - 1 )
 
+		pending = []
+
 		for field in self._shownFields:
 			if not recalculate and rowIdx<len(self._renderedModel) and field in self._renderedModel[rowIdx] and self._renderedModel[rowIdx][field]:
 				lbl = self._renderedModel[rowIdx][field]
 			else:
-				if field in self._cellRender.keys():
-					lbl = self._cellRender[field].viewWidget(obj[field])
-				elif field in obj.keys():
-					lbl = html5.Div(obj[field])
-				else:
-					lbl = html5.Div("...")
-				lbl.addClass("ignt-table-content")
-				self._renderedModel[rowIdx][field] = lbl
+				lbl = self._renderCell(field, obj, lazy=self.lazyCells)
+				if not self._compact:
+					self._renderedModel[rowIdx][field] = lbl
+
+			if getattr(lbl, "pendingRender", None):
+				pending.append(lbl)
 
 			self.table.setCell( rowIdx, cellIdx, lbl )
 			cellIdx += 1
 
+		if pending:
+			self._pendingCells[obj["_uniqeIndex"]] = pending
+			self._schedulePendingCells()
+
 	def rebuildTable(self, recalculate=True):
 		"""
 			Rebuilds the entire table.
@@ -693,8 +1128,8 @@ class DataTable( html5.Div ):
 		self.clear( keepModel=True )
 		#self.table.prepareGrid( len(self._model), len(self._shownFields))
 		self.table.fastGrid( len(self._model), len(self._shownFields))
-		for obj in self._model:
-			self._renderObject( obj, tableIsPrepared=True, recalculate=recalculate )
+		for rowIdx, obj in enumerate(self._model):
+			self._renderObject( obj, tableIsPrepared=True, recalculate=recalculate, rowIdx=rowIdx )
 
 	def setShownFields(self,fields):
 		"""
@@ -704,6 +1139,12 @@ class DataTable( html5.Div ):
 			:param fields: List of model-keys which will be displayed.
 			:type fields: list
 		"""
+		if not self.providesFields(fields):
+			# Compact rows don't contain the new fields, so they must be fetched again
+			self._shownFields = fields
+			self.clear()
+			return
+
 		self._shownFields = fields
 		self.rebuildTable(recalculate=True) #we only add or remove new rows, dont recalculate existing values
 		self.table.tableChangedEvent.fire( self, self.getRowCount() )
@@ -779,6 +1220,7 @@ class DataTable( html5.Div ):
 			self.selectionActivatedEvent.fire( self, selection )
 
 class ViewportDataTable(DataTable):
+	lazyCells = False # Only the shown rows are rendered anyway
 
 	def __init__(self, _loadOnDisplay=False, rows=99, *args, **kwargs):
 		super(ViewportDataTable, self).__init__(_loadOnDisplay,*args,**kwargs)
@@ -792,7 +1234,7 @@ class ViewportDataTable(DataTable):
 		"""
 		self.table.dropTableContent()
 		if not keepModel:
-			self._model = []
+			self._model = self._newModel()
 
 	def rebuildTable(self , recalculate=True):
 		"""
@@ -809,9 +1251,8 @@ class ViewportDataTable(DataTable):
 			self.table.clear()
 			self.table.fastGrid( self._rows, len(self._shownFields), createHidden = True) #at the beginning all rows are hidden
 
-		for idx, obj in enumerate(self._model):
-			if idx < self._rows:
-				self._renderObject( obj, tableIsPrepared=True, recalculate=recalculate )
+		for idx, obj in enumerate(self._model[:self._rows]):
+			self._renderObject( obj, tableIsPrepared=True, recalculate=recalculate, rowIdx=idx )
 
 
 	def add(self, obj):
@@ -847,7 +1288,8 @@ class ViewportDataTable(DataTable):
 		self.table.dropTableContent()
 
 		for obj in objList:
-			self._renderedModel.append( { } )
+			if not self._compact:
+				self._renderedModel.append( { } )
 			if writeToModel:
 				obj["_uniqeIndex"] = self._modelIdx
 				self._modelIdx += 1
@@ -861,7 +1303,7 @@ class ViewportDataTable(DataTable):
 
 		self.table.tableChangedEvent.fire( self, self.getRowCount())
 
-	def _renderObject(self, obj, tableIsPrepared=True, recalculate=True):
+	def _renderObject(self, obj, tableIsPrepared=True, recalculate=True, rowIdx=None):
 		"""
 			Renders the object to into the table.
 			Does nothing if the list of _shownFields is empty.
@@ -875,23 +1317,217 @@ class ViewportDataTable(DataTable):
 		if not self._shownFields:
 			return
 
-		rowIdx = self._model.index(obj) % self._rows
+		if rowIdx is None:
+			rowIdx = self._model.index(obj)
+
+		rowIdx %= self._rows
 		cellIdx = 0
 
 		for field in self._shownFields:
 			if not recalculate and rowIdx<len(self._renderedModel) and field in self._renderedModel[rowIdx] and self._renderedModel[rowIdx][field]:
 				lbl = self._renderedModel[rowIdx][field]
 			else:
-
-				if field in self._cellRender.keys():
-					lbl = self._cellRender[field].viewWidget(obj[field])
-				elif field in obj.keys():
-					lbl = html5.Div(obj[field])
-				else:
-					lbl = html5.Div("...")
-				lbl.addClass("ignt-table-content")
-				self._renderedModel[ rowIdx ][ field ] = lbl
+				lbl = self._renderCell(field, obj)
+				if not self._compact:
+					self._renderedModel[ rowIdx ][ field ] = lbl
 
 			self.table.getTrByIndex(rowIdx).removeClass("is-hidden") #unhide used rows
 			self.table.setCell( rowIdx, cellIdx, lbl )
 			cellIdx += 1
+
+
+class VirtualDataTable(DataTable):
+	"""
+		DataTable rendering only the rows inside the visible viewport.
+
+		A pool of row elements sized to the viewport plus an overscan is recycled while scrolling,
+		so the amount of DOM elements doesn't depend on the amount of loaded rows. All rows share
+		the same height, which maps the scroll position directly onto a row number.
+	"""
+	selectTableClass = VirtualSelectTable
+	lazyCells = False # Only the rows inside the viewport are rendered anyway
+
+	def __init__(self, _loadOnDisplay=False, rowHeight=32, overscan=10, *args, **kwargs):
+		super(VirtualDataTable, self).__init__(_loadOnDisplay, *args, **kwargs)
+		self.addClass("vi-datatable--virtual")
+		self["style"]["overflow-y"] = "auto"
+
+		self._rowHeight = rowHeight # Height of every row in pixels
+		self._overscan = overscan # Rows rendered above and below the visible rows
+		self._poolSize = 0 # Amount of row elements currently created
+		self._poolCols = 0 # Amount of columns of the row elements
+		self._slotObjs = [] # Row object currently rendered into each row element, or None
+
+		self.sinkEvent("onScroll")
+
+	def onAttach(self):
+		super(VirtualDataTable, self).onAttach()
+		self._renderWindow()
+
+	def _visibleRows(self):
+		height = self.element.clientHeight or html5.window.innerHeight
+		return int(height // self._rowHeight) + 1
+
+	def _renderWindow(self, force=False):
+		"""
+			Renders the rows around the current scroll position into the pool of row elements.
+		"""
+		if not self._shownFields:
+			return
+
+		poolSize = self._visibleRows() + 2 * self._overscan
+		if force or poolSize != self._poolSize or len(self._shownFields) != self._poolCols:
+			self.table.clearRows()
+			self.table.fastGrid(poolSize, len(self._shownFields), createHidden=True)
+			self._poolSize = poolSize
+			self._poolCols = len(self._shownFields)
+			self._slotObjs = [None] * poolSize
+			force = True
+
+			for tr in self.table.body._children:
+				tr["style"]["height"] = "%dpx" % self._rowHeight
+
+		# Move the window in steps of overscan, so scrolling doesn't re-render on every single row
+		firstVisible = int(self.element.scrollTop // self._rowHeight)
+		offset = max(0, (firstVisible // self._overscan) * self._overscan - self._overscan)
+		offset = max(0, min(offset, len(self._model) - self._poolSize))
+
+		if not force and offset == self.table._offset and len(self._model) == self.table._rowCount:
+			return
+
+		self.table._offset = offset
+		self.table._rowCount = len(self._model)
+
+		# Only slots showing another row than before are rendered again
+		for slot in range(self._poolSize):
+			rowIdx = offset + slot
+			obj = self._model[rowIdx] if rowIdx < len(self._model) else None
+
+			if force or obj is None or self._slotObjs[slot] is not obj:
+				self._renderSlot(slot, rowIdx)
+
+		rest = max(0, len(self._model) - offset - self._poolSize)
+		self.table["style"]["margin-top"] = "%dpx" % (offset * self._rowHeight)
+		self.table["style"]["margin-bottom"] = "%dpx" % (rest * self._rowHeight)
+
+		self.table.applyRowStates()
+
+	def _renderSlot(self, slot, rowIdx):
+		tr = self.table.body._children[slot]
+
+		if rowIdx >= len(self._model):
+			self._slotObjs[slot] = None
+			tr.addClass("is-hidden")
+			return
+
+		obj = self._model[rowIdx]
+		self._slotObjs[slot] = obj
+
+		for cellIdx, field in enumerate(self._shownFields):
+			self.table.setCell(slot, cellIdx, self._renderCell(field, obj))
+
+		tr.removeClass("is-hidden")
+
+	def _renderObject(self, obj, tableIsPrepared=True, recalculate=True, rowIdx=None):
+		"""
+			Renders the object, if it is inside the current window.
+		"""
+		if not self._shownFields or not self._poolSize:
+			return
+
+		if rowIdx is None:
+			rowIdx = self._model.index(obj)
+
+		slot = rowIdx - self.table._offset
+		if 0 <= slot < self._poolSize:
+			self._renderSlot(slot, rowIdx)
+
+	def add(self, obj):
+		self.update([obj])
+
+	def update(self, objList, writeToModel=True):
+		"""
+			Adds multiple rows at once and refreshes the window.
+		"""
+		if writeToModel:
+			for obj in objList:
+				obj["_uniqeIndex"] = self._modelIdx
+				self._modelIdx += 1
+				self._model.append(obj)
+
+		self._isAjaxLoading = False
+		if "is-loading" in self.table["class"]:
+			self.table.removeClass("is-loading")
+
+		self._renderWindow()
+		self.table.tableChangedEvent.fire(self, self.getRowCount())
+
+	def remove(self, objOrIndex):
+		"""
+			Removes 'obj' from the table, see DataTable.remove().
+		"""
+		if isinstance(objOrIndex, dict):
+			assert objOrIndex in self._model, "Cannot remove unknown object from Table"
+			objOrIndex = self._model.index(objOrIndex)
+		if not isinstance(objOrIndex, int):
+			raise TypeError("Expected int or dict, got %s" % str(type(objOrIndex)))
+
+		assert objOrIndex >= 0 and objOrIndex < len(self._model), "Modelindex out of range"
+		self._model.pop(objOrIndex)
+
+		# Row numbers behind the removed row move up by one
+		self.table._selectedRows = {x - 1 if x > objOrIndex else x
+		                            for x in self.table._selectedRows if x != objOrIndex}
+		if self.table._currentRow is not None:
+			if self.table._currentRow == objOrIndex:
+				self.table._currentRow = None
+			elif self.table._currentRow > objOrIndex:
+				self.table._currentRow -= 1
+
+		self._renderWindow()
+		self.table.selectionChangedEvent.fire(self.table, self.table.getCurrentSelection())
+		self.table.tableChangedEvent.fire(self, self.getRowCount())
+
+	def clear(self, keepModel=False):
+		"""
+			Flushes the whole table.
+		"""
+		self.table.clear()
+		self._poolSize = 0
+		self._slotObjs = []
+		self.element.scrollTop = 0
+
+		if not keepModel:
+			self._model = self._newModel()
+			self._renderedModel = []
+
+	def rebuildTable(self, recalculate=True):
+		self._renderWindow(force=True)
+
+	def onScroll(self, event):
+		"""
+			Re-renders the window and fetches the next batch when the end of the loaded rows is reached.
+		"""
+		self._renderWindow()
+
+		if (not self._isAjaxLoading and self._dataProvider
+				and self.element.scrollTop + self.element.clientHeight
+					>= (len(self._model) - self._overscan) * self._rowHeight):
+			self._isAjaxLoading = True
+			if not "is-loading" in self.table["class"]:
+				self.table.addClass("is-loading")
+
+			self._dataProvider.onNextBatchNeeded()
+
+	def onCursorMoved(self, table, row):
+		"""
+			Scrolls the cursor row into view; the window follows by the resulting scroll event.
+		"""
+		if row is None:
+			return
+
+		top = row * self._rowHeight
+		if self.element.scrollTop > top:
+			self.element.scrollTop = top
+		elif self.element.scrollTop + self.element.clientHeight < top + self._rowHeight:
+			self.element.scrollTop = top + self._rowHeight - self.element.clientHeight
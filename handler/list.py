@@ -147,7 +147,8 @@ class ListHandler(Pane):
 			NetworkService.request(
 				self.moduleName,
 				self.moduleInfo["views.request"],
-				successHandler=self._onRequestViewsAvailable
+				successHandler=self._onRequestViewsAvailable,
+				batchable=True
 			)
 
 		super(ListHandler, self).onClick(*args, **kwargs)
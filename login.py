@@ -348,6 +348,10 @@ class LoginScreen(Screen):
 		self.show()
 		self.lock()
 
+		# Security keys and cached responses are bound to the session, which is about to change.
+		NetworkService.flushSkeyPool()
+		NetworkService.invalidateCache()
+
 		#Enforce logout
 		if logout:
 			NetworkService.request("user", "logout",
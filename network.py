@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 import os, sys, json, string, random, time, logging
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from js import JSON, Object, Array
 
 from vi import html5
 from vi import framework
@@ -17,6 +21,7 @@ class HTTPRequest(object):
 	"""
 		Wrapper around XMLHttpRequest
 	"""
+	_latin1ToBytes = None # JS function converting a latin-1 string into a Uint8Array
 
 	def __init__(self, *args, **kwargs):
 		super(HTTPRequest, self).__init__(*args, **kwargs)
@@ -24,6 +29,7 @@ class HTTPRequest(object):
 		self.req.onreadystatechange = self.onReadyStateChange
 		self.cb = None
 		self.hasBeenSent = False
+		self.aborted = False
 
 	def asyncGet(self, url, cb):
 		"""
@@ -49,14 +55,42 @@ class HTTPRequest(object):
 		"""
 		self.cb = cb
 		self.type = "POST"
-		self.payload = payload
+		self.payload = HTTPRequest.toUint8Array(payload) if isinstance(payload, bytes) else payload
 		self.content_type = content_type
 		self.req.open("POST", url, True)
 
+	@staticmethod
+	def toUint8Array(data):
+		"""
+			Converts bytes into a Uint8Array, as XMLHttpRequest.send() doesn't receive Python bytes as binary data.
+
+			The bytes are passed as a string with one character per byte and copied by JS.
+		"""
+		if HTTPRequest._latin1ToBytes is None:
+			HTTPRequest._latin1ToBytes = html5.jseval(
+				"(function(s) {"
+				"	var a = new Uint8Array(s.length);"
+				"	for(var i = 0; i < s.length; i++) a[i] = s.charCodeAt(i);"
+				"	return a;"
+				"})"
+			)
+
+		return HTTPRequest._latin1ToBytes(data.decode("latin-1"))
+
+	def abort(self):
+		"""
+			Aborts the request. The callback target is not called anymore.
+		"""
+		self.aborted = True
+		self.req.abort()
+
 	def onReadyStateChange(self, *args, **kwargs):
 		"""
 			Internal callback.
 		"""
+		if self.aborted:
+			return
+
 		if self.req.readyState == 1 and not self.hasBeenSent:
 			self.hasBeenSent = True  # Internet Explorer calls this function twice!
 
@@ -72,6 +106,232 @@ class HTTPRequest(object):
 				self.cb.onError(self.req.responseText, self.req.status)
 
 
+class LazyJson(object):
+	"""
+		Read-only mapping on a JSON object parsed by the browser's native JSON.parse.
+
+		Values are converted into Python objects when they are accessed for the first time,
+		so parts of a response which are not used are never converted. Converted values are
+		kept and returned again on later accesses, so they must not be modified either.
+
+		Converting requires JsProxy.to_py(), which older Pyodide versions don't provide;
+		see isSupported().
+	"""
+
+	_supported = None # Whether JS objects can be converted by to_py(), determined on first use
+
+	def __init__(self, obj):
+		self._obj = obj
+		self._values = {}
+
+	@staticmethod
+	def isSupported():
+		if LazyJson._supported is None:
+			LazyJson._supported = hasattr(JSON.parse("{}"), "to_py")
+
+		return LazyJson._supported
+
+	@staticmethod
+	def toPython(value):
+		return value.to_py() if hasattr(value, "to_py") else value
+
+	def __getitem__(self, key):
+		if key not in self._values:
+			if not Object.prototype.hasOwnProperty.call(self._obj, key):
+				raise KeyError(key)
+
+			self._values[key] = LazyJson.toPython(getattr(self._obj, key))
+
+		return self._values[key]
+
+	def __contains__(self, key):
+		return key in self._values or bool(Object.prototype.hasOwnProperty.call(self._obj, key))
+
+	def __iter__(self):
+		return iter(self.keys())
+
+	def __len__(self):
+		return len(self.keys())
+
+	def get(self, key, default=None):
+		if key in self:
+			return self[key]
+
+		return default
+
+	def keys(self):
+		return list(Object.keys(self._obj))
+
+	def items(self):
+		return [(key, self[key]) for key in self.keys()]
+
+
+class SkeyFetcher(object):
+	"""
+		Callback target for security key fetches issued by the NetworkService security key pool.
+	"""
+
+	def onCompletion(self, text):
+		NetworkService.onSkeyFetched(json.loads(text))
+
+	def onError(self, text, code):
+		NetworkService.onSkeyFailed(text, code)
+
+
+class PersistentCache(object):
+	"""
+		IndexedDB-backed cache for responses of requests made with persistent=True.
+
+		All entries are loaded into conf["cacheObj"] during startup, so they can be served
+		immediately while the request is revalidated against the server (stale-while-revalidate).
+		Entries are only served for the server version they were persisted under. Until the server
+		version is known, which is itself persisted, entries are served regardless of it.
+	"""
+	storeName = "vi_cache"
+	maxSize = 2 * 1024 * 1024  # Maximum size in characters of all persisted responses
+	version = None  # Custom version tag; entries persisted under another version are dropped
+
+	@staticmethod
+	def currentVersion():
+		return "%s%s/%s" % (".".join([str(x) for x in conf["vi.version"]]),
+		                    conf["vi.version.appendix"], PersistentCache.version or "")
+
+	@staticmethod
+	def serverVersion():
+		"""
+			Returns the version of the server, once it is known from /vi/getVersion.
+		"""
+		if conf.get("core.version"):
+			return ".".join([str(x) for x in conf["core.version"]])
+
+		return None
+
+	@staticmethod
+	def load(callback):
+		"""
+			Loads all valid entries from the IndexedDB into conf["cacheObj"] and calls 'callback'
+			afterwards. 'callback' is called in any case, even if the IndexedDB is not available.
+		"""
+		idb = conf["indexeddb"]
+		state = {"done": False}
+
+		def done(*args, **kwargs):
+			if not state["done"]:
+				state["done"] = True
+				callback()
+
+		def onData(event):
+			version = PersistentCache.currentVersion()
+
+			for item in list(event.detail["data"]):
+				if item["version"] != version:
+					idb.dbAction("delete", PersistentCache.storeName, item["key"])
+					continue
+
+				conf["cacheObj"][item["key"]] = {
+					"module": item["module"],
+					"version": item["version"],
+					"serverVersion": item.get("serverVersion"),
+					"data": item["data"],
+					"ts": item["ts"]
+				}
+
+			done()
+
+		def onConnected(event):
+			if PersistentCache.storeName in idb.objectStoreNames:
+				db = idb.getList(PersistentCache.storeName)
+				db.addEventListener("dataready", onData)
+				db.addEventListener("error", done)
+			else:
+				idb.dbAction("createStore", PersistentCache.storeName)
+				done()
+
+		try:
+			db = idb.connect()
+			db.addEventListener("success", onConnected)
+			db.addEventListener("error", done)
+		except Exception as e:
+			logging.warning("persistent cache not available: %r", e)
+			done()
+			return
+
+		# Never let the startup wait too long for the IndexedDB
+		DeferredCall(done, _delay=1000)
+
+	@staticmethod
+	def entryKey(cacheKey):
+		return json.dumps(list(cacheKey))
+
+	@staticmethod
+	def get(cacheKey):
+		"""
+			Returns the persisted response text for 'cacheKey', or None.
+			Entries persisted under another server version are dropped.
+		"""
+		key = PersistentCache.entryKey(cacheKey)
+		entry = conf["cacheObj"].get(key)
+
+		if not entry:
+			return None
+
+		serverVersion = PersistentCache.serverVersion()
+
+		if serverVersion is not None and entry.get("serverVersion") != serverVersion:
+			del conf["cacheObj"][key]
+			conf["indexeddb"].dbAction("delete", PersistentCache.storeName, key)
+			return None
+
+		return entry["data"]
+
+	@staticmethod
+	def put(cacheKey, module, text):
+		"""
+			Persists a response, evicting the oldest entries when maxSize would be exceeded.
+		"""
+		size = len(text)
+		if size > PersistentCache.maxSize:
+			return
+
+		key = PersistentCache.entryKey(cacheKey)
+		conf["cacheObj"].pop(key, None)
+
+		entries = sorted(conf["cacheObj"].items(), key=lambda item: item[1]["ts"])
+		total = sum([len(entry["data"]) for _, entry in entries])
+
+		while entries and total + size > PersistentCache.maxSize:
+			evictKey, evicted = entries.pop(0)
+			total -= len(evicted["data"])
+			del conf["cacheObj"][evictKey]
+			conf["indexeddb"].dbAction("delete", PersistentCache.storeName, evictKey)
+
+		entry = {
+			"module": module,
+			"version": PersistentCache.currentVersion(),
+			"serverVersion": PersistentCache.serverVersion(),
+			"data": text,
+			"ts": time.time()
+		}
+
+		conf["cacheObj"][key] = entry
+		conf["indexeddb"].dbAction("put", PersistentCache.storeName, key, dict(entry, key=key))
+
+	@staticmethod
+	def invalidate(module=None):
+		"""
+			Drops all persisted responses of module 'module', or all of them if module is None.
+		"""
+		if module is None:
+			conf["cacheObj"].clear()
+			conf["indexeddb"].dbAction("clear", PersistentCache.storeName)
+			return
+
+		for key, entry in list(conf["cacheObj"].items()):
+			if entry["module"] == module:
+				del conf["cacheObj"][key]
+				conf["indexeddb"].dbAction("delete", PersistentCache.storeName, key)
+
+
 class NetworkService(object):
 	"""
 		Generic wrapper around ajax requests.
@@ -89,19 +349,129 @@ class NetworkService(object):
 	retryMax = 3
 	retryDelay = 5000
 
+	skeyPoolSize = 3  # Number of security keys kept ready for secure requests
+	skeyMaxAge = 300  # Seconds a prefetched security key is considered to be fresh
+	_skeyPool = []  # Prefetched (skey, timestamp) tuples
+	_skeyWaiting = []  # Requests waiting for a security key
+	_skeyFetching = 0  # Number of currently running security key fetches
+
+	notifyDelay = 250  # Milliseconds to wait for further changes before change listeners are notified
+	notifyMaxDelay = 5000  # Milliseconds after which collected changes are notified in any case
+	_pendingChanges = {}  # module->collected changes not notified yet
+
+	responseCacheSize = 4 * 1024 * 1024  # Maximum size in characters of all cached responses
+	_responseCache = OrderedDict()  # (module, url, params)->response text, in LRU order
+	_responseCacheBytes = 0  # Current size of all cached responses
+	_inflight = {}  # (module, url, params)->currently running cacheable request
+	cacheHits = 0  # Requests answered from the response cache
+	cacheShared = 0  # Requests which joined an identical request already running
+	cacheMisses = 0  # Cacheable requests which had to be fetched from the server
+
+	priorities = ["interactive", "visible", "prefetch", "bulk"]  # Priority classes, in order of precedence
+	maxConnections = 6  # Requests running at the same time per host
+	priorityConnections = {"prefetch": 4, "bulk": 2}  # Requests of a priority class running at the same time
+	_queues = {}  # priority->OrderedDict of group->requests waiting for a connection, groups in round-robin order
+	_connections = {}  # host->number of running requests
+	_running = {}  # priority->number of running requests
+	queueMaxDepth = 0  # Most requests waiting at the same time
+	queueDispatched = 0  # Requests started by the scheduler
+	queueWaitTime = 0.0  # Seconds all dispatched requests spent waiting
+
+	batchUrl = None  # Server endpoint receiving batched requests, e.g. "/json/batch"; batching is disabled if None
+	batchMaxSize = 20  # Maximum number of requests sent in one batch
+	_batch = []  # Batchable requests issued within the current tick
+
+	jsonBody = False  # Send parameters as JSON instead of multipart, if supported by the server
+
 	@staticmethod
-	def notifyChange(module, **kwargs):
+	def notifyChange(module, _delay=None, **kwargs):
 		"""
 			Broadcasts a change made to data of module 'module' to all currently
 			registered changeListeners.
 			Also invalidates our _cache
+
+			Changes are not broadcasted immediately, but collected per module until no further
+			change arrived for notifyDelay milliseconds (or notifyMaxDelay milliseconds passed).
+			A longer _delay of one change holds back the entire collection, even if later
+			changes use a shorter one.
+			The listeners then receive one aggregated event, where 'keys' is the set of all changed
+			keys (or None if the module changed as a whole) and 'actions' the set of all actions.
+			'key' and 'action' are only provided when they are unique.
+
 			:param module: Name of the module where the change occured
 			:type module: str
+			:param _delay: Milliseconds to wait for further changes, defaults to notifyDelay
+			:type _delay: int
 		"""
 		if module in NetworkService._cache.keys():
 			NetworkService._cache[module] += 1
 
-		for c in NetworkService.changeListeners:
+		NetworkService.invalidateCache(module)
+
+		if _delay is None:
+			_delay = NetworkService.notifyDelay
+
+		pending = NetworkService._pendingChanges.get(module)
+		if pending is None:
+			pending = NetworkService._pendingChanges[module] = {
+				"since": time.time(),
+				"deadline": 0,
+				"keys": set(),
+				"actions": set(),
+				"kwargs": {}
+			}
+
+			# One call per collection, which waits again while the deadline is moved further
+			DeferredCall(NetworkService.flushChange, module, True, _delay=_delay)
+
+		pending["deadline"] = max(pending["deadline"], time.time() + _delay / 1000)
+
+		key = kwargs.pop("key", None)
+		keys = kwargs.pop("keys", None)
+		action = kwargs.pop("action", None)
+
+		if pending["keys"] is not None:
+			if key:
+				pending["keys"].add(key)
+			elif keys:
+				pending["keys"].update(keys)
+			else:
+				pending["keys"] = None  # unspecific change, affects the entire module
+
+		if action:
+			pending["actions"].add(action)
+
+		pending["kwargs"].update(kwargs)
+
+	@staticmethod
+	def flushChange(module, delayed=False):
+		"""
+			Broadcasts the collected changes of module 'module' to all registered changeListeners.
+			Internally, this is called delayed by notifyChange; if delayed is set, it only
+			broadcasts once the deadline of the collected changes or notifyMaxDelay is exceeded.
+		"""
+		pending = NetworkService._pendingChanges.get(module)
+		if pending is None:
+			return
+
+		if delayed:
+			now = time.time()
+			remaining = min(pending["deadline"] - now,
+			                pending["since"] + NetworkService.notifyMaxDelay / 1000 - now)
+
+			if remaining > 0:
+				DeferredCall(NetworkService.flushChange, module, True, _delay=int(remaining * 1000) + 1)
+				return
+
+		del NetworkService._pendingChanges[module]
+
+		kwargs = pending["kwargs"]
+		kwargs["keys"] = pending["keys"]
+		kwargs["key"] = next(iter(pending["keys"])) if pending["keys"] and len(pending["keys"]) == 1 else None
+		kwargs["actions"] = pending["actions"]
+		kwargs["action"] = next(iter(pending["actions"])) if len(pending["actions"]) == 1 else None
+
+		for c in NetworkService.changeListeners[:]:
 			c.onDataChanged(module, **kwargs)
 
 	@staticmethod
@@ -109,7 +479,8 @@ class NetworkService(object):
 		"""
 			Registers object 'listener' for change notifications.
 			'listener' must provide an 'onDataChanged' function accepting
-			one parameter: the name of the module. Does nothing if that object
+			the name of the module and the aggregated change information as
+			keyword arguments (see notifyChange). Does nothing if that object
 			has already registered.
 			:param listener: The object to register
 			:type listener: object
@@ -129,83 +500,491 @@ class NetworkService(object):
 		assert listener in NetworkService.changeListeners, "Attempt to remove unregistered listener %s" % str(listener)
 		NetworkService.changeListeners.remove(listener)
 
+	@staticmethod
+	def responseCacheKey(module, url, params):
+		"""
+			Builds the key under which the response of a cacheable request is cached.
+		"""
+		try:
+			params = json.dumps(params, sort_keys=True)
+		except (TypeError, ValueError):
+			params = repr(params)
+
+		return module, url, params
+
+	@staticmethod
+	def fetchFromCache(req):
+		"""
+			Tries to answer the cacheable request 'req' without starting another XHR.
+
+			If the response is cached, it is delivered asynchronously. If an identical request
+			is already running, 'req' is answered together with that request.
+			Otherwise, 'req' is registered as the running request for its cache key.
+
+			:returns: True if 'req' will be answered without doing its own XHR.
+		"""
+		key = req.cacheKey
+
+		if key in NetworkService._responseCache:
+			NetworkService.cacheHits += 1
+			NetworkService._responseCache.move_to_end(key)
+			DeferredCall(req.onCompletion, NetworkService._responseCache[key])
+			return True
+
+		if key in NetworkService._inflight:
+			NetworkService.cacheShared += 1
+			req.leader = NetworkService._inflight[key]
+			req.leader.followers.append(req)
+			return True
+
+		NetworkService.cacheMisses += 1
+		NetworkService._inflight[key] = req
+		return False
+
+	@staticmethod
+	def storeResponse(key, text):
+		"""
+			Puts a response into the cache, evicting least recently used responses if necessary.
+		"""
+		size = len(text)
+		if size > NetworkService.responseCacheSize:
+			return
+
+		if key in NetworkService._responseCache:
+			NetworkService._responseCacheBytes -= len(NetworkService._responseCache.pop(key))
+
+		while NetworkService._responseCache and \
+				NetworkService._responseCacheBytes + size > NetworkService.responseCacheSize:
+			_, evicted = NetworkService._responseCache.popitem(last=False)
+			NetworkService._responseCacheBytes -= len(evicted)
+
+		NetworkService._responseCache[key] = text
+		NetworkService._responseCacheBytes += size
+
+	@staticmethod
+	def invalidateCache(module=None):
+		"""
+			Drops all cached and persisted responses of module 'module', or the entire cache if module is None.
+			Running requests for that module won't be shared with later requests anymore.
+		"""
+		for key in list(NetworkService._responseCache.keys()):
+			if module is None or key[0] == module:
+				NetworkService._responseCacheBytes -= len(NetworkService._responseCache.pop(key))
+
+		for key in list(NetworkService._inflight.keys()):
+			if module is None or key[0] == module:
+				del NetworkService._inflight[key]
+
+		PersistentCache.invalidate(module)
+
+	@staticmethod
+	def cacheStats():
+		"""
+			Returns the response cache counters, for tuning purposes.
+		"""
+		return {
+			"hits": NetworkService.cacheHits,
+			"shared": NetworkService.cacheShared,
+			"misses": NetworkService.cacheMisses,
+			"entries": len(NetworkService._responseCache),
+			"size": NetworkService._responseCacheBytes
+		}
+
+	@staticmethod
+	def schedule(req):
+		"""
+			Queues the request 'req' until a connection is available for it.
+
+			Requests are started by priority class. Within a class, the groups (by default the widgets
+			issuing them) take turns, so one pane can't occupy all connections while another one is waiting.
+		"""
+		req.queuedAt = time.time()
+
+		queue = NetworkService._queues.setdefault(req.priority, OrderedDict())
+		queue.setdefault(req.group, []).append(req)
+
+		NetworkService.queueMaxDepth = max(NetworkService.queueMaxDepth, NetworkService.queueDepth())
+		NetworkService.dispatch()
+
+	@staticmethod
+	def defaultGroup(module, successHandler):
+		"""
+			Determines the group of a request without an explicit group.
+
+			Requests handled by a method take turns with the requests of other objects, so two panes
+			on the same module are served alternately. Other requests are grouped by module.
+		"""
+		owner = getattr(successHandler, "__self__", None)
+
+		if owner is None or isinstance(owner, type):
+			return module
+
+		return owner
+
+	@staticmethod
+	def dispatch():
+		"""
+			Starts waiting requests as long as connections are available.
+		"""
+		started = True
+
+		while started:
+			started = False
+
+			for priority in NetworkService.priorities:
+				queue = NetworkService._queues.get(priority)
+				if not queue:
+					continue
+
+				if NetworkService._running.get(priority, 0) >= \
+						NetworkService.priorityConnections.get(priority, NetworkService.maxConnections):
+					continue
+
+				for group, waiting in list(queue.items()):
+					req = next((r for r in waiting
+					            if NetworkService._connections.get(r.host, 0) < NetworkService.maxConnections), None)
+
+					if req is None:
+						continue
+
+					waiting.remove(req)
+
+					if waiting:
+						queue.move_to_end(group)
+					else:
+						del queue[group]
+
+					NetworkService.queueDispatched += 1
+					NetworkService.queueWaitTime += time.time() - req.queuedAt
+
+					req.acquireConnection()
+					req.start()
+
+					started = True
+					break
+
+				if started:
+					break
+
+	@staticmethod
+	def addToBatch(req):
+		"""
+			Collects the request 'req', to be sent together with the other batchable requests
+			issued within the same tick.
+		"""
+		NetworkService._batch.append(req)
+
+		if len(NetworkService._batch) == 1:
+			DeferredCall(NetworkService.sendBatch, _delay=0)
+
+	@staticmethod
+	def sendBatch():
+		"""
+			Sends the collected batchable requests as one POST to batchUrl.
+
+			The endpoint receives the field "requests", a JSON list of {"url": ..., "params": ...} objects,
+			and must answer with a JSON list of {"status": ..., "body": ...} objects in the same order.
+		"""
+		batch = NetworkService._batch
+		NetworkService._batch = []
+
+		while batch:
+			chunk = batch[:NetworkService.batchMaxSize]
+			batch = batch[NetworkService.batchMaxSize:]
+
+			if len(chunk) == 1:
+				NetworkService.schedule(chunk[0])
+				continue
+
+			carrier = NetworkService.request(
+				None, NetworkService.batchUrl,
+				{"requests": json.dumps([req.batchEntry() for req in chunk])},
+				successHandler=NetworkService.onBatchCompleted,
+				failureHandler=NetworkService.onBatchFailed,
+				priority=min([req.priority for req in chunk], key=NetworkService.priorities.index),
+				group=NetworkService.batchUrl,
+				kickoff=False
+			)
+			carrier.batch = chunk
+			carrier.kickoff()
+
+	@staticmethod
+	def onBatchCompleted(carrier):
+		"""
+			Passes the responses of a batch to the handlers of the original requests.
+		"""
+		responses = json.loads(carrier.result)
+
+		for idx, req in enumerate(carrier.batch):
+			if idx >= len(responses):
+				req.kickoffs = NetworkService.retryMax  # don't retry
+				req.onError("", 500)
+				continue
+
+			status = int(responses[idx]["status"])
+
+			if 200 <= status < 300:
+				req.onCompletion(responses[idx]["body"])
+			else:
+				req.onError(responses[idx]["body"], status)
+
+	@staticmethod
+	def onBatchFailed(carrier, code):
+		"""
+			Fails all requests of a batch; the batch itself has already been retried.
+		"""
+		for req in carrier.batch:
+			req.kickoffs = carrier.kickoffs  # don't retry again
+			req.onError(carrier.result, code)
+
+	@staticmethod
+	def unschedule(req):
+		"""
+			Removes the request 'req' from the queue, if it is still waiting for a connection.
+		"""
+		queue = NetworkService._queues.get(req.priority) or {}
+		waiting = queue.get(req.group)
+
+		if waiting and req in waiting:
+			waiting.remove(req)
+
+			if not waiting:
+				del queue[req.group]
+
+	@staticmethod
+	def queueDepth(priority=None):
+		"""
+			Returns the number of requests waiting for a connection, of priority class 'priority' or in total.
+		"""
+		return sum([
+			len(waiting)
+			for prio, queue in NetworkService._queues.items() if priority is None or prio == priority
+			for waiting in queue.values()
+		])
+
+	@staticmethod
+	def queueStats():
+		"""
+			Returns the scheduler counters, for tuning purposes.
+		"""
+		return {
+			"queued": {priority: NetworkService.queueDepth(priority) for priority in NetworkService.priorities},
+			"running": {priority: NetworkService._running.get(priority, 0) for priority in NetworkService.priorities},
+			"connections": dict(NetworkService._connections),
+			"maxDepth": NetworkService.queueMaxDepth,
+			"dispatched": NetworkService.queueDispatched,
+			"avgWait": NetworkService.queueWaitTime / NetworkService.queueDispatched
+			            if NetworkService.queueDispatched else 0.0
+		}
+
+	@staticmethod
+	def acquireSkey(req):
+		"""
+			Provides a security key to the NetworkService request 'req'.
+
+			If a fresh key is available from the pool, req.onSkeyAvailable() is called immediately,
+			otherwise req is queued until a key has been fetched. The pool is refilled in background.
+
+			:param req: The request waiting for a security key
+			:type req: NetworkService
+		"""
+		now = time.time()
+		NetworkService._skeyPool = [
+			(skey, ts) for skey, ts in NetworkService._skeyPool if now - ts < NetworkService.skeyMaxAge
+		]
+
+		if NetworkService._skeyPool:
+			skey, _ = NetworkService._skeyPool.pop(0)
+			req.onSkeyAvailable(skey, fromPool=True)
+		else:
+			NetworkService._skeyWaiting.append(req)
+
+		NetworkService.refillSkeyPool()
+
+	@staticmethod
+	def refillSkeyPool():
+		"""
+			Starts as many security key fetches as required to serve all waiting requests
+			and to fill up the pool to skeyPoolSize.
+		"""
+		missing = NetworkService.skeyPoolSize + len(NetworkService._skeyWaiting) \
+		            - len(NetworkService._skeyPool) - NetworkService._skeyFetching
+
+		for _ in range(missing):
+			NetworkService._skeyFetching += 1
+			HTTPRequest().asyncGet("%s%s/skey" % (NetworkService.host, NetworkService.prefix), SkeyFetcher())
+
+	@staticmethod
+	def flushSkeyPool():
+		"""
+			Drops all prefetched security keys, e.g. when the session has changed or keys
+			have been rejected by the server.
+		"""
+		NetworkService._skeyPool = []
+
+	@staticmethod
+	def onSkeyFetched(skey):
+		"""
+			Internal hook for a succeeded security key fetch.
+		"""
+		NetworkService._skeyFetching -= 1
+
+		if NetworkService._skeyWaiting:
+			NetworkService._skeyWaiting.pop(0).onSkeyAvailable(skey)
+		else:
+			NetworkService._skeyPool.append((skey, time.time()))
+
+	@staticmethod
+	def onSkeyFailed(text, code):
+		"""
+			Internal hook for a failed security key fetch.
+			The failure is passed to the longest waiting request, which handles retries by itself.
+		"""
+		NetworkService._skeyFetching -= 1
+
+		if NetworkService._skeyWaiting:
+			req = NetworkService._skeyWaiting.pop(0)
+			req.waitingForSkey = False
+			req.onError(text, code)
+
 	@staticmethod
 	def genReqStr(params: dict):
 		"""
 			Creates a MIME (multipart/mixed) payload for post requests transmitting
 			the values given in params.
 
+			Parts are collected in a list and joined once. Values of type bytes and file contents
+			are transmitted unchanged; in this case, the payload is returned as bytes, which
+			HTTPRequest.asyncPost() converts into a Uint8Array.
+
 			:param params: Dictionary of key->values to encode
 			:type params: dict
 
-			:returns: (string payload, string boundary)
+			:returns: (string or bytes payload, string boundary)
 		"""
-		boundary_str = "---" + ''.join(
+		boundary = "---" + "".join(
 			[random.choice(string.ascii_lowercase + string.ascii_uppercase + string.digits) for x in range(13)])
-		boundary = boundary_str
+		separator = "\r\n--" + boundary
+
+		parts = [f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\nMIME-Version: 1.0\r\n", separator]
+		binary = False
 
-		res = f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\nMIME-Version: 1.0\r\n"
-		res += "\r\n--" + boundary
+		# Iterative depth-first traversal, in the order of the former recursive implementation
+		stack = [(key, value) for key, value in reversed(list(params.items()))]
 
-		def expand(key, value):
-			ret = ""
+		while stack:
+			key, value = stack.pop()
 
-			if all([x in dir(value) for x in ["name", "read"]]):  # File
-				type = "application/octet-stream"
-				filename = os.path.basename(value.name).decode(sys.getfilesystemencoding())
+			if hasattr(value, "read") and hasattr(value, "name"):  # File
+				filename = os.path.basename(value.name)
+				if isinstance(filename, bytes):
+					filename = filename.decode(sys.getfilesystemencoding())
 
-				ret += \
-					f"\r\nContent-Type: {type}" \
-					f"\r\nMIME-Version: 1.0" \
+				content = value.read()
+				binary = binary or isinstance(content, bytes)
+
+				parts.append(
+					"\r\nContent-Type: application/octet-stream"
+					"\r\nMIME-Version: 1.0"
 					f"\r\nContent-Disposition: form-data; name=\"{key}\"; filename=\"{filename}\"\r\n\r\n"
-				ret += str(value.read())
-				ret += '\r\n--' + boundary
+				)
+				parts.append(content)
+				parts.append(separator)
 
 			elif isinstance(value, list):
 				if any([isinstance(entry, dict) for entry in value]):
-					for idx, entry in enumerate(value):
-						ret += expand(key + "." + str(idx), entry)
+					stack.extend([(key + "." + str(idx), entry) for idx, entry in reversed(list(enumerate(value)))])
 				else:
-					for entry in value:
-						ret += expand(key, entry)
+					stack.extend([(key, entry) for entry in reversed(value)])
 
 			elif isinstance(value, dict):
-				for key_, entry in value.items():
-					ret += expand(((key + ".") if key else "") + key_, entry)
+				stack.extend([(((key + ".") if key else "") + key_, entry)
+				              for key_, entry in reversed(list(value.items()))])
 
 			else:
-				ret += \
-					"\r\nContent-Type: application/octet-stream" \
-					"\r\nMIME-Version: 1.0" \
+				parts.append(
+					"\r\nContent-Type: application/octet-stream"
+					"\r\nMIME-Version: 1.0"
 					f"\r\nContent-Disposition: form-data; name=\"{key}\"\r\n\r\n"
-				ret += str(value) if value is not None else ""
-				ret += '\r\n--' + boundary
+				)
 
-			return ret
+				if isinstance(value, (bytes, bytearray)):
+					binary = True
+					parts.append(bytes(value))
+				else:
+					parts.append(str(value) if value is not None else "")
 
-		for key, value in params.items():
-			res += expand(key, value)
+				parts.append(separator)
 
-		res += "--\r\n"
+		parts.append("--\r\n")
 
-		# fixme: DEBUG!
-		#print(res)
+		if binary:
+			return b"".join([part if isinstance(part, bytes) else part.encode("utf-8") for part in parts]), boundary
 
-		return res, boundary
+		return "".join(parts), boundary
 
 	@staticmethod
-	def decode(req):
+	def hasFiles(params):
+		"""
+			Checks if params contain files or bytes, which can't be transmitted as JSON.
+		"""
+		stack = [params]
+
+		while stack:
+			value = stack.pop()
+
+			if isinstance(value, dict):
+				stack.extend(value.values())
+			elif isinstance(value, list):
+				stack.extend(value)
+			elif isinstance(value, (bytes, bytearray)) or (hasattr(value, "read") and hasattr(value, "name")):
+				return True
+
+		return False
+
+	@staticmethod
+	def decode(req, lazy=False):
 		"""
 			Decodes a response received from the server (ie parsing the json)
+
+			The decoded response is kept on the request, so decoding it again returns the same object.
+			All handlers of a request share it; a handler modifying it must not rely on another handler \
+			of the same request to see the original response. Every request, including identical ones \
+			served from the cache or by a shared fetch, decodes its own object.
+
 			:type req: Instance of NetworkService response
+			:param lazy: Parse by the browser's JSON.parse and return objects as LazyJson, which converts \
+			values on access. Only suitable for handlers reading single keys of the response. \
+			Where the running Pyodide can't convert JS objects, the response is decoded eagerly instead.
+			:type lazy: bool
 			:returns: object
 		"""
-		return json.loads(req.result)
+		lazy = lazy and LazyJson.isSupported()
+
+		decoded = getattr(req, "_decoded", None)
+		if decoded and decoded[0] is req.result and decoded[1] == lazy:
+			return decoded[2]
+
+		if lazy:
+			obj = JSON.parse(req.result)
+
+			if hasattr(obj, "to_py") and not Array.isArray(obj):
+				res = LazyJson(obj)
+			else:
+				res = LazyJson.toPython(obj)
+		else:
+			res = json.loads(req.result)
+
+		try:
+			req._decoded = (req.result, lazy, res)
+		except AttributeError:
+			pass
+
+		return res
 
 	@staticmethod
 	def isOkay(req):
-		answ = NetworkService.decode(req)
-		return isinstance(answ, str) and answ == "OKAY"
+		return NetworkService.decode(req) == "OKAY"
 
 	@staticmethod
 	def urlForArgs(module, path, cacheable):
@@ -242,7 +1021,8 @@ class NetworkService(object):
 		return NetworkService.host + href
 
 	def __init__(self, module, url, params, successHandler, failureHandler, finishedHandler,
-	             modifies, cacheable, secure, kickoff):
+	             modifies, cacheable, secure, kickoff, persistent=False, priority="interactive", group=None,
+	             batchable=False, revalidatedHandler=None):
 		"""
 			Constructs a new NetworkService request.
 			Should not be called directly (use NetworkService.request instead).
@@ -250,6 +1030,7 @@ class NetworkService(object):
 		super(NetworkService, self).__init__()
 
 		self.result = None
+		self._decoded = None  # (result, lazy, decoded result) of NetworkService.decode()
 		self.status = None
 		self.waitingForSkey = False
 		self.module = module
@@ -259,28 +1040,68 @@ class NetworkService(object):
 		self.successHandler = [successHandler] if successHandler else []
 		self.failureHandler = [failureHandler] if failureHandler else []
 		self.finishedHandler = [finishedHandler] if finishedHandler else []
+		self.revalidatedHandler = [revalidatedHandler] if revalidatedHandler else []
 
 		self.modifies = modifies
 		self.cacheable = cacheable
 		self.secure = secure
+		self.skeyFromPool = False
+		self.skeyRetried = False
+
+		self.cacheKey = NetworkService.responseCacheKey(module, url, params) if cacheable else None
+		self.followers = []  # Identical requests waiting for this request to finish
+		self.leader = None  # Identical request this request is waiting for
+		self.http = None  # HTTPRequest currently running
+		self.persistent = persistent and cacheable
+		self.staleResult = None  # Persisted response already delivered to the handlers
+
+		assert priority in NetworkService.priorities, "Unknown priority %r" % priority
+		self.priority = priority
+		self.group = group if group is not None else NetworkService.defaultGroup(module, successHandler)
+		self.host = NetworkService.host if module else urlsplit(url).netloc
+		self.connected = False  # Holds one of the connections of the scheduler
+		self.batchable = batchable and not secure and not modifies and (params is None or isinstance(params, dict))
 
 		self.kickoffs = 0
 		if kickoff:
 			self.kickoff()
 
 	def kickoff(self):
+		if self.status == "aborted":
+			return
+
 		self.status = "running"
 		self.kickoffs += 1
 
+		if self.cacheKey and self.kickoffs == 1:
+			if NetworkService.fetchFromCache(self):
+				return
+
+			if self.persistent:
+				stale = PersistentCache.get(self.cacheKey)
+				if stale is not None:
+					DeferredCall(self.onStaleResult, stale)
+
+		if self.batchable and NetworkService.batchUrl:
+			NetworkService.addToBatch(self)
+			return
+
+		NetworkService.schedule(self)
+
+	def start(self):
+		"""
+			Internal hook called by the scheduler, when a connection is available.
+		"""
 		if self.secure:
 			self.waitingForSkey = True
-			self.doFetch("%s%s/skey" % (NetworkService.host, NetworkService.prefix), None, None)
+			NetworkService.acquireSkey(self)
 		else:
 			self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable), self.params, None)
 
 	@staticmethod
 	def request(module, url, params=None, successHandler=None, failureHandler=None,
-	            finishedHandler=None, modifies=False, cacheable=False, secure=False, kickoff=True):
+	            finishedHandler=None, modifies=False, cacheable=False, secure=False, kickoff=True,
+	            persistent=False, priority="interactive", group=None, batchable=False, revalidatedHandler=None):
 		"""
 			Performs an AJAX request. Handles caching and security-keys.
 
@@ -303,6 +1124,23 @@ class NetworkService(object):
 			:type cacheable: bool
 			:param secure: If true, include a fresh securitykey in this request. Defaults to False.
 			:type secure: bool
+			:param persistent: If true, a cacheable request is also cached persistently. A persisted response is \
+			delivered immediately and revalidated in background. The handlers only see the persisted response; \
+			if the fresh one differs, revalidatedHandler is called with it and a change of the module is broadcasted.
+			:type persistent: bool
+			:param priority: Priority class of the request, one of NetworkService.priorities: "interactive" \
+			for requests the user is waiting for, "visible" for content of a displayed pane, "prefetch" \
+			for data which might be needed soon and "bulk" for background work like exports.
+			:type priority: str
+			:param group: Requests of a priority class take turns by group. Defaults to the object owning \
+			successHandler, usually the widget displaying the data, or the module for other handlers.
+			:type group: object
+			:param batchable: If true, the request may be sent together with other requests issued within \
+			the same tick, when NetworkService.batchUrl is set. Secure and modifying requests are never batched.
+			:type batchable: bool
+			:param revalidatedHandler: function being called if a persisted response delivered before was \
+			outdated. Must take one argument (the request, holding the fresh response).
+			:type revalidatedHandler: callable
 
 		"""
 		logging.info("NS REQUEST", module, url, params)
@@ -311,7 +1149,20 @@ class NetworkService(object):
 		# Seems not cacheable or not cached
 		return NetworkService(module, url, params,
 		                      successHandler, failureHandler, finishedHandler,
-		                      modifies, cacheable, secure, kickoff)
+		                      modifies, cacheable, secure, kickoff, persistent, priority, group, batchable,
+		                      revalidatedHandler)
+
+	def batchEntry(self):
+		"""
+			Returns the description of this request sent within a batch.
+		"""
+		url = NetworkService.urlForArgs(self.module, self.url, self.cacheable)
+		params = self.params
+
+		if "updateParams" in conf and conf["updateParams"] and callable(conf["updateParams"]):
+			params = conf["updateParams"](url, params)
+
+		return {"url": url, "params": params or {}}
 
 	def doFetch(self, url, params, skey):
 		"""
@@ -327,18 +1178,20 @@ class NetworkService(object):
 
 			contentType = None
 
-			if isinstance(params, dict):
+			if isinstance(params, dict) and NetworkService.jsonBody and not NetworkService.hasFiles(params):
+				multipart = json.dumps(params, default=str)
+				contentType = "application/json; charset=utf-8"
+			elif isinstance(params, dict):
 				multipart, boundary = NetworkService.genReqStr(params)
 				contentType = "multipart/form-data; boundary=" + boundary + "; charset=utf-8"
 			elif isinstance(params, bytes):
 				contentType = "application/x-www-form-urlencoded"
 				multipart = params
 			else:
-				print(params)
-				print(type(params))
 				multipart = params
 
-			HTTPRequest().asyncPost(url, multipart, self, content_type=contentType)
+			self.http = HTTPRequest()
+			self.http.asyncPost(url, multipart, self, content_type=contentType)
 
 		else:
 			if skey:
@@ -347,56 +1200,181 @@ class NetworkService(object):
 				else:
 					url += "?skey=%s" % skey
 
-			HTTPRequest().asyncGet(url, self)
+			self.http = HTTPRequest()
+			self.http.asyncGet(url, self)
+
+	def abort(self):
+		"""
+			Cancels the request; its handlers are not called anymore.
+
+			A waiting request is removed from the queue, a running XHR is aborted and a pending retry
+			is dropped. If identical requests are waiting for the response of this request, it is still
+			fetched for them.
+		"""
+		if self.status not in ["running", "retrying"]:
+			return
+
+		self.successHandler = []
+		self.failureHandler = []
+		self.finishedHandler = []
+
+		if self.followers:
+			return
+
+		self.status = "aborted"
+
+		if self.leader and self in self.leader.followers:
+			self.leader.followers.remove(self)
+
+		NetworkService.unschedule(self)
+
+		if self in NetworkService._batch:
+			NetworkService._batch.remove(self)
+
+		if self in NetworkService._skeyWaiting:
+			NetworkService._skeyWaiting.remove(self)
+
+		if self.cacheKey and NetworkService._inflight.get(self.cacheKey) is self:
+			del NetworkService._inflight[self.cacheKey]
+
+		if self.http:
+			self.http.abort()
+			self.http = None
+
+		self.releaseConnection()
+		self.clear()
+
+	def acquireConnection(self):
+		self.connected = True
+		NetworkService._connections[self.host] = NetworkService._connections.get(self.host, 0) + 1
+		NetworkService._running[self.priority] = NetworkService._running.get(self.priority, 0) + 1
+
+	def releaseConnection(self):
+		"""
+			Returns the connection of this request to the scheduler and starts the next waiting request.
+		"""
+		if not self.connected:
+			return
+
+		self.connected = False
+		NetworkService._connections[self.host] -= 1
+		NetworkService._running[self.priority] -= 1
+
+		NetworkService.dispatch()
+
+	def onSkeyAvailable(self, skey, fromPool=False):
+		"""
+			Internal hook called by the security key pool.
+		"""
+		self.waitingForSkey = False
+		self.skeyFromPool = fromPool
+		self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable), self.params, skey)
+
+	def onStaleResult(self, text):
+		"""
+			Internal hook delivering a persisted response while the request is still running.
+		"""
+		if self.status != "running":
+			return
+
+		self.staleResult = text
+		self.result = text
+
+		for s in self.successHandler:
+			s(self)
+		for s in self.finishedHandler:
+			s(self)
 
 	def onCompletion(self, text):
 		"""
 			Internal hook for the AJAX call.
 		"""
-		if self.waitingForSkey:
-			self.waitingForSkey = False
-			self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable),
-			             self.params, json.loads(text))
-		else:
-			self.result = text
-			self.status = "succeeded"
-			try:
-				for s in self.successHandler:
-					s(self)
-				for s in self.finishedHandler:
+		if self.status == "aborted":
+			return
+
+		self.result = text
+		self.status = "succeeded"
+		self.releaseConnection()
+
+		if self.cacheKey and NetworkService._inflight.get(self.cacheKey) is self:
+			del NetworkService._inflight[self.cacheKey]
+
+			# The persisted response delivered before is outdated, so announce a change.
+			if self.staleResult is not None and self.staleResult != text and self.module:
+				NetworkService.notifyChange(self.module)
+
+			NetworkService.storeResponse(self.cacheKey, text)
+
+			if self.persistent:
+				PersistentCache.put(self.cacheKey, self.module, text)
+
+		followers = self.followers
+		self.followers = []
+
+		for f in followers:
+			f.onCompletion(text)
+
+		# The handlers already received the persisted response; an outdated one is only
+		# replaced by the revalidated handlers and the change broadcasted above.
+		if self.staleResult is not None:
+			if self.staleResult != text:
+				for s in self.revalidatedHandler:
 					s(self)
-			except:
-				if self.modifies:
-					DeferredCall(
-						NetworkService.notifyChange, self.module,
-						key=self.params.get("key") if self.params else None,
-						action=self.url,
-						_delay=2500
-					)
-				raise
 
+			self.clear()
+			return
+
+		try:
+			for s in self.successHandler:
+				s(self)
+			for s in self.finishedHandler:
+				s(self)
+		except:
 			if self.modifies:
-				DeferredCall(
-					NetworkService.notifyChange, self.module,
+				NetworkService.notifyChange(
+					self.module,
 					key=self.params.get("key") if self.params else None,
-					action=self.url, _delay=2500
+					action=self.url,
+					_delay=2500
 				)
+			raise
 
-			# Remove references to our handlers
-			self.clear()
+		if self.modifies:
+			NetworkService.notifyChange(
+				self.module,
+				key=self.params.get("key") if self.params else None,
+				action=self.url, _delay=2500
+			)
+
+		# Remove references to our handlers
+		self.clear()
 
 	def onError(self, text, code):
 		"""
 			Internal hook for the AJAX call.
 		"""
+		if self.status == "aborted":
+			return
+
 		self.status = "failed"
 		self.result = text
+		self.releaseConnection()
 
 		logging.error(
 			"received http %r (kickoffs=%r, retryMax=%r, retryCodes=%r)",
 		    code, self.kickoffs, self.retryMax, self.retryCodes
 		)
 
+		if self.secure and int(code) in [401, 403]:
+			NetworkService.flushSkeyPool()
+
+			# A prefetched key may have become invalid meanwhile, so retry once with a fresh one.
+			if self.skeyFromPool and not self.skeyRetried:
+				logging.info("security key from pool rejected with %r, will retry now", code)
+				self.skeyRetried = True
+				self.kickoff()
+				return
+
 		if self.kickoffs < self.retryMax and int(code) in self.retryCodes:
 			try:
 				logError = html5.window.logError
@@ -407,9 +1385,26 @@ class NetworkService(object):
 				code, self.module, self.url, self.params))
 
 			logging.info("error %r, kickoff %r: will retry now" , code, self.kickoffs)
+			self.status = "retrying"  # still abortable; kickoff() does nothing once aborted
 			DeferredCall(self.kickoff, _delay=self.retryDelay)
 			return
 
+		if self.cacheKey and NetworkService._inflight.get(self.cacheKey) is self:
+			del NetworkService._inflight[self.cacheKey]
+
+		followers = self.followers
+		self.followers = []
+
+		for f in followers:
+			f.kickoffs = self.kickoffs  # don't retry again
+			f.onError(text, code)
+
+		# Keep the persisted response when the server is just not reachable
+		if self.staleResult is not None and int(code) in self.retryCodes:
+			logging.warning("revalidation failed with %r, keeping persisted response", code)
+			self.clear()
+			return
+
 		for s in self.failureHandler:
 			s(self, code)
 
@@ -432,4 +1427,5 @@ class NetworkService(object):
 		self.successHandler = []
 		self.finishedHandler = []
 		self.failureHandler = []
+		self.revalidatedHandler = []
 		self.params = None
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+	Checks the request scheduling and batching of network.py outside of the browser.
+
+	The browser APIs used by network.py are replaced by a fake XMLHttpRequest, which only records
+	the requests sent and answers them when told to, and a DeferredCall running its calls on run().
+	Batches are answered by batchHandler(), a stand-in for the batch endpoint of the server.
+	Run it by "python3 test-network.py" from the vi folder.
+"""
+import os, re, sys, json, types, importlib.util
+from urllib.parse import urlsplit
+
+sent = [] # FakeXHRs in the order their requests were sent
+deferred = [] # Calls waiting for run()
+
+
+class FakeXHR(object):
+	"""
+		Stand-in for XMLHttpRequest, answered by respond().
+	"""
+
+	def __init__(self):
+		self.readyState = 0
+		self.status = 0
+		self.responseText = ""
+		self.payload = None
+
+	def open(self, method, url, async_):
+		self.method = method
+		self.url = url
+		self.readyState = 1
+		deferred.append(self.onreadystatechange)
+
+	def setRequestHeader(self, name, value):
+		pass
+
+	def send(self, payload):
+		self.payload = payload
+		sent.append(self)
+
+	def abort(self):
+		self.readyState = 4
+		self.status = 0
+		self.onreadystatechange()
+
+	def respond(self, text="\"OKAY\"", status=200):
+		self.readyState = 4
+		self.status = status
+		self.responseText = text
+		self.onreadystatechange()
+
+
+class DeferredCall(object):
+	def __init__(self, func, *args, _delay=None, **kwargs):
+		deferred.append(lambda: func(*args, **kwargs))
+
+
+def run():
+	"""
+		Runs the deferred calls, including the ones queued while running.
+	"""
+	while deferred:
+		deferred.pop(0)()
+
+
+def running():
+	"""
+		Returns the FakeXHRs sent and not answered yet, in the order they were sent.
+	"""
+	return [xhr for xhr in sent if xhr.readyState == 1]
+
+
+def path(xhr):
+	return xhr.url.split("?")[0]
+
+
+def formFields(xhr):
+	"""
+		Returns the fields of the multipart payload sent by 'xhr'.
+	"""
+	return dict(re.findall(r"name=\"([^\"]+)\"\r\n\r\n(.*?)\r\n--", xhr.payload, re.S))
+
+
+def batchHandler(fields, dispatch):
+	"""
+		Stand-in for the batch endpoint, implementing the protocol of NetworkService.sendBatch().
+
+		fields["requests"] is a JSON list of {"url": ..., "params": ...} objects. Every request is answered
+		by dispatch(path, params), returning (status, body); the answer is a JSON list of
+		{"status": ..., "body": ...} objects in the order of the requests.
+	"""
+	res = []
+
+	for entry in json.loads(fields["requests"]):
+		try:
+			status, body = dispatch(urlsplit(entry["url"]).path, entry.get("params") or {})
+		except Exception as e:
+			status, body = 500, json.dumps(str(e))
+
+		res.append({"status": status, "body": body})
+
+	return json.dumps(res)
+
+
+def canned(responses):
+	"""
+		Returns a dispatch function for batchHandler() answering from a dict of path -> response.
+	"""
+	def dispatch(path, params):
+		if path in responses:
+			return 200, json.dumps(responses[path])
+
+		return 404, json.dumps("NOT FOUND")
+
+	return dispatch
+
+
+def loadNetwork():
+	"""
+		Loads network.py as vi.network, with stand-ins for the modules only available in the browser.
+	"""
+	js = types.ModuleType("js")
+	js.JSON = types.SimpleNamespace(parse=json.loads)
+	js.Object = js.Array = None
+
+	vi = types.ModuleType("vi")
+	vi.__path__ = []
+
+	vi.html5 = types.ModuleType("vi.html5")
+	vi.html5.jseval = lambda code: FakeXHR()
+
+	vi.framework = types.ModuleType("vi.framework")
+	vi.framework.utils = types.SimpleNamespace(DeferredCall=DeferredCall)
+
+	vi.config = types.ModuleType("vi.config")
+	vi.config.conf = {"cacheObj": {}, "indexeddb": types.SimpleNamespace(dbAction=lambda *args: None),
+	                  "vi.version": [3, 0, 0], "vi.version.appendix": "", "core.version": None}
+
+	sys.modules.update({"js": js, "vi": vi, "vi.html5": vi.html5,
+	                    "vi.framework": vi.framework, "vi.config": vi.config})
+
+	spec = importlib.util.spec_from_file_location(
+		"vi.network", os.path.join(os.path.dirname(os.path.abspath(__file__)), "network.py"))
+	network = importlib.util.module_from_spec(spec)
+	sys.modules["vi.network"] = network
+	spec.loader.exec_module(network)
+
+	return network
+
+
+class Pane(object):
+	"""
+		Stands in for a widget displaying the responses of its requests.
+	"""
+
+	def __init__(self, name):
+		self.name = name
+
+	def onCompletion(self, req):
+		pass
+
+
+def testDispatchOrder(NetworkService):
+	"""
+		Two panes on the same module and a CSV export compete for the connections of one host.
+	"""
+	paneA = Pane("A")
+	paneB = Pane("B")
+
+	for i in range(10):
+		NetworkService.request("file", "export/%d" % i, successHandler=lambda req: None, priority="bulk")
+
+	for i in range(8):
+		NetworkService.request("file", "list/a%d" % i, successHandler=paneA.onCompletion, priority="visible")
+
+	for i in range(8):
+		NetworkService.request("file", "list/b%d" % i, successHandler=paneB.onCompletion, priority="visible")
+
+	NetworkService.request("user", "view/self", priority="interactive")
+	run()
+
+	first = [path(xhr) for xhr in sent]
+	print("started first:", first)
+
+	# The export and pane A took all connections, everything else is waiting
+	assert len(first) == NetworkService.maxConnections
+	assert NetworkService.queueDepth() == 8 + 4 + 8 + 1
+
+	# Answer the requests one by one in the order they were started
+	while running():
+		running()[0].respond()
+		run()
+
+	order = [path(xhr) for xhr in sent]
+	print("dispatch order:", order)
+
+	queued = order[len(first):]
+	assert queued[0] == "/json/user/view/self", "interactive requests must go first"
+
+	visible = [p.split("/")[-1] for p in queued if "/list/" in p]
+	assert visible[:8] == ["a4", "b0", "a5", "b1", "a6", "b2", "a7", "b3"], "panes of one module must take turns"
+
+	assert all(["/export/" in p for p in queued[1 + len(visible):]]), "bulk requests must wait for visible ones"
+
+	print("stats:", NetworkService.queueStats())
+
+
+def testBatching(NetworkService):
+	"""
+		Batchable requests issued within one tick are sent as one request and answered one by one.
+	"""
+	del sent[:]
+	NetworkService.batchUrl = "/json/batch"
+	got = []
+
+	NetworkService.request("user", "view/self", successHandler=lambda req: got.append(("user", NetworkService.decode(req))),
+	                       batchable=True)
+	NetworkService.request("file", "listRootNodes", successHandler=lambda req: got.append(("roots", NetworkService.decode(req))),
+	                       batchable=True)
+	NetworkService.request("file", "view/node/missing", failureHandler=lambda req, code: got.append(("missing", code)),
+	                       batchable=True)
+	NetworkService.request("file", "edit/abc", {"name": "x"}, successHandler=lambda req: got.append(("edit", NetworkService.decode(req))),
+	                       modifies=True, batchable=True)
+	run()
+
+	print("sent:", [path(xhr) for xhr in sent])
+	assert sorted([path(xhr) for xhr in sent]) == ["/json/batch", "/json/file/edit/abc"], "modifying requests are never batched"
+
+	dispatch = canned({"/json/user/view/self": {"values": {"name": "admin"}}, "/json/file/listRootNodes": [{"key": "root"}]})
+
+	for xhr in running():
+		if path(xhr) == "/json/batch":
+			xhr.respond(batchHandler(formFields(xhr), dispatch))
+		else:
+			xhr.respond("\"OKAY\"")
+
+		run()
+
+	print("answers:", got)
+	assert sorted(got, key=str) == sorted([
+		("user", {"values": {"name": "admin"}}),
+		("roots", [{"key": "root"}]),
+		("missing", 404),
+		("edit", "OKAY")
+	], key=str)
+
+	NetworkService.batchUrl = None
+
+
+def testBatchFailed(NetworkService):
+	"""
+		When the batch itself fails, every request of the batch fails with its status.
+	"""
+	del sent[:]
+	NetworkService.batchUrl = "/json/batch"
+	failed = []
+
+	for name in ["a", "b", "c"]:
+		NetworkService.request("file", "view/" + name, successHandler=lambda req: failed.append("success"),
+		                       failureHandler=lambda req, code, name=name: failed.append((name, code)), batchable=True)
+
+	run()
+	assert [path(xhr) for xhr in sent] == ["/json/batch"]
+
+	running()[0].respond("\"Internal Server Error\"", 500)
+	run()
+
+	print("failed:", failed)
+	assert failed == [("a", 500), ("b", 500), ("c", 500)]
+	assert not running(), "failed batches are not retried per request"
+
+	NetworkService.batchUrl = None
+
+
+def testRevalidation(network):
+	"""
+		A persisted response is delivered once; an outdated one is replaced through revalidatedHandler only.
+	"""
+	NetworkService = network.NetworkService
+	del sent[:]
+	got = []
+
+	network.PersistentCache.put(NetworkService.responseCacheKey(None, "/vi/config", None), None, json.dumps({"modules": "old"}))
+
+	NetworkService.request(None, "/vi/config",
+	                       successHandler=lambda req: got.append(("success", NetworkService.decode(req))),
+	                       revalidatedHandler=lambda req: got.append(("revalidated", NetworkService.decode(req))),
+	                       cacheable=True, persistent=True)
+	run()
+
+	assert got == [("success", {"modules": "old"})], "the persisted response is delivered before the server answers"
+
+	running()[0].respond(json.dumps({"modules": "new"}))
+	run()
+
+	print("revalidation:", got)
+	assert got == [("success", {"modules": "old"}), ("revalidated", {"modules": "new"})]
+
+
+def testAbortRetry(NetworkService):
+	"""
+		A request aborted while waiting for its retry is not sent again and calls no handlers.
+	"""
+	del sent[:]
+	got = []
+
+	req = NetworkService.request("file", "view/retry", successHandler=lambda req: got.append("success"),
+	                             failureHandler=lambda req, code: got.append(("failure", code)))
+	run()
+
+	running()[0].respond("", 0)
+	req.abort()
+	run()
+
+	assert [path(xhr) for xhr in sent] == ["/json/file/view/retry"], "the retry must not be sent"
+	assert not got, "handlers of an aborted request must not be called"
+
+
+if __name__ == "__main__":
+	network = loadNetwork()
+
+	testDispatchOrder(network.NetworkService)
+	testBatching(network.NetworkService)
+	testBatchFailed(network.NetworkService)
+	testRevalidation(network)
+	testAbortRetry(network.NetworkService)
+	print("ok")
@@ -21,6 +21,10 @@ lngDe = {
 	"Select Filter": "Filtern",
 	"Delete them?": "Wirklich löschen?",
 	"Delete {amt} Entries?": "Sollen {amt} Einträge gelöscht werden?",
+	"Deleting {amt} entries": "{amt} Einträge werden gelöscht",
+	"{amt} entries deleted": "{amt} Einträge gelöscht",
+	"{amt} entries deleted, {failed} failed": "{amt} Einträge gelöscht, {failed} fehlgeschlagen",
+	"Entry {key} could not be deleted (status: {code})": "Eintrag {key} konnte nicht gelöscht werden (Status: {code})",
 	"Keep": "Behalten",
 	"Directory Name": "Verzeichnisname",
 	"Create directory": "Neues Verzeichnis erstellen",
@@ -198,6 +202,10 @@ lngDe = {
 	"vi.sidebar.internalpreview": "Details",
 
 	"Load all": "Alles laden",
+	"Clear cache": "Cache leeren",
+	"Cache cleared": "Cache wurde geleert",
+	"{count} datasets, {size} kB": "{count} Datensätze, {size} kB",
+	"CSV export cancelled": "CSV-Export abgebrochen",
 	"Find on Page": "finden",
 
 	"all elements loaded: {amt}, pages: {pg}": "Alles geladen: {amt} Elemente, {pg} Seite(n)",
@@ -1,60 +1,163 @@
 #-*- coding: utf-8 -*-
 
+import ast, operator, re, sys
+from collections import OrderedDict
+
 from vi import html5
 from js import CustomEvent
 from vi.config import conf
 
-def formatOneEntry(key, format, data, structure = None, prefix = None, language = None, context=None, _rec = 0):
-	res = format
-	val = data[ key ]
+class FormatTemplate(object):
+	"""
+	A format string of formatString(), parsed once into literal text and $(...) placeholders.
+
+	Templates are cached by format and prefix, converted structures by their identity.
+	Rendering only walks the paths referenced by the placeholders, instead of every key of the data.
+	"""
+	templates = OrderedDict()
+	structures = OrderedDict()
+	cacheSize = 1000
+	empty = object() # Resolved value blanking the entire result
+
+	def __init__(self, format, prefix):
+		self.format = format
+		self.parts = [] # Literal strings and (token, path) tuples, with paths relative to prefix
+		self.tokens = set()
+
+		pos = 0
+		for match in re.finditer(r"\$\(([^()]*)\)", format):
+			path = match.group(1).split(".")
+
+			if path[:len(prefix)] != prefix or len(path) <= len(prefix):
+				continue
+
+			if match.start() > pos:
+				self.parts.append(format[pos:match.start()])
+
+			self.parts.append((match.group(0), path[len(prefix):]))
+			self.tokens.add(match.group(0))
+			pos = match.end()
+
+		if pos < len(format):
+			self.parts.append(format[pos:])
+
+		self.prefix = ".".join(prefix + [""])
+
+	@staticmethod
+	def get(format, prefix):
+		key = (format, tuple(prefix))
+
+		template = FormatTemplate.templates.get(key)
+		if template is not None:
+			FormatTemplate.templates.move_to_end(key)
+			return template
+
+		template = FormatTemplate.templates[key] = FormatTemplate(format, prefix)
+		if len(FormatTemplate.templates) > FormatTemplate.cacheSize:
+			FormatTemplate.templates.popitem(last=False)
+
+		return template
+
+	@staticmethod
+	def asDict(structure):
+		"""
+		Returns structure as dict; lists of (key, value) tuples are converted once.
+		"""
+		if not isinstance(structure, list):
+			return structure
+
+		cached = FormatTemplate.structures.get(id(structure))
+		if cached is not None and cached[0] is structure:
+			return cached[1]
+
+		FormatTemplate.structures[id(structure)] = (structure, {k: v for k, v in structure})
+		if len(FormatTemplate.structures) > FormatTemplate.cacheSize:
+			FormatTemplate.structures.popitem(last=False)
+
+		return FormatTemplate.structures[id(structure)][1]
+
+	def render(self, data, structure, language):
+		res = []
+
+		for part in self.parts:
+			if isinstance(part, str):
+				res.append(part)
+				continue
+
+			token, path = part
+			value = self.resolve(data, structure, path, 0, language)
+
+			if value is FormatTemplate.empty:
+				return ""
+
+			res.append(token if value is None else value)
+
+		return "".join(res)
 
-	# Get structure if available
-	struct = structure.get( key ) if structure else None
-	if isinstance( struct, list ):
-		struct = { k: v for k, v in struct }
+	def resolve(self, data, structure, path, depth, language):
+		"""
+		Resolves path[depth:] on data; returns None when the placeholder can't be replaced.
+		"""
+		key = path[depth]
+		if not isinstance(data, dict) or key not in data:
+			return None
+
+		val = data[key]
+
+		# Get structure if available
+		struct = FormatTemplate.asDict(structure.get(key)) if structure else None
+
+		if depth + 1 < len(path):
+			if isinstance(val, dict):
+				# A multilang bone is rendered as a whole when its placeholder is used
+				if struct and "$(%s%s)" % (self.prefix, ".".join(path[:depth + 1])) in self.tokens:
+					return None
+
+				return self.resolve(val, structure, path, depth + 1, language)
+
+			elif isinstance(val, list) and len(val) > 0 and isinstance(val[0], dict):
+				if struct and "dest" in val[0] and "rel" in val[0]:
+					return None
+
+				return self.resolve(val[0], struct, path, depth + 1, language)
+
+			return None
+
+		if isinstance(val, dict): # if bone is multilang, only render current lang
+			if struct:
+				langs = struct.get("languages")
+				if not langs:
+					return FormatTemplate.empty
 
-	if isinstance( val, dict ): # if bone is multilang, only render current lang
-		if struct and ("$(%s)" % ".".join( prefix + [ key ] )) in res:
-			langs = struct.get( "languages" )
-			if langs:
 				if language and language in langs:
-					val = val.get( language, "" )
+					val = val.get(language, "")
 				else:
 					val = ", ".join([str(value) for value in val.values()])
 
-			else:
-				return ""
+		elif isinstance(val, list) and len(val) > 0 and isinstance(val[0], dict): #if bone is relationalbone with rel and dest
+			if struct and "dest" in val[0] and "rel" in val[0]:
+				format = self.format
 
-		else:
-			res = formatString( res, val, structure, prefix + [ key ], language, _rec = _rec + 1 )
+				if "relskel" in struct and "format" in struct:
+					format = struct["format"]
+					struct = struct["relskel"]
 
-	elif isinstance( val, list ) and len( val ) > 0 and isinstance( val[ 0 ], dict ): #if bone is relationalbone with rel and dest
-		if struct and "dest" in val[ 0 ] and "rel" in val[ 0 ]:
-			if "relskel" in struct and "format" in struct:
-				format = struct[ "format" ]
-				struct = struct[ "relskel" ]
+				return ", ".join([formatString(format, v, struct, [], language) for v in val])
 
-			res = res.replace( "$(%s)" % ".".join( prefix + [ key ] ), ", ".join( [ formatString( format, v, struct, [ ], language, _rec = _rec + 1 ) for v in val ] ) )
-		else:
-			res = formatString( res, val[ 0 ], struct, prefix + [ key ], language, _rec = _rec + 1 )
+		elif isinstance(val, list): # list values like multistr
+			val = ", ".join(map(str, val))
 
-	elif isinstance( val, list ): # list values like multistr
-		val = ", ".join( map( str, val ) )
+		# Check for select-bones
+		if isinstance(struct, dict) and "values" in struct and struct["values"]: #if selectbone translate key to value
+			vals = FormatTemplate.asDict(struct["values"])
 
-	# Check for select-bones
-	if isinstance( struct, dict ) and "values" in struct and struct[ "values" ]: #if selectbone translate key to value
-		vals = struct[ "values" ]
+			# NO elif!
+			if isinstance(vals, dict) and not isinstance(val, (dict, list)):
+				if val in vals:
+					val = vals[val]
 
-		if isinstance( vals, list ):
-			vals = { k: v for k, v in vals }
+		return str(val)
 
-		# NO elif!
-		if isinstance( vals, dict ):
-			if val in vals:
-				val = vals[ val ]
-
-	res = res.replace( "$(%s)" % (".".join( prefix + [ key ] )), str( val ) )
-	return res
 
 def formatString(format, data, structure = None, prefix = None, language = None, context=None, _rec = 0):
 	"""
@@ -84,37 +187,252 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 	:rtype: str
 	"""
 
-	#if _rec == 0:
-	#	print("--- formatString ---")
-	#	print(format)
-	#	print(data)
-	#	print(structure)
-	#	print(prefix)
-	#	print(language)
-
-	if structure and isinstance(structure, list):
-		structure = {k:v for k, v in structure}
-
-	prefix = prefix or []
-	res = format
-
-	if isinstance(data,  list):
+	if isinstance(data, list):
 		return ", ".join([formatString(format, x, structure, prefix, language, _rec = _rec + 1) for x in data])
 
 	elif isinstance(data, str):
 		return data
 
 	elif not data:
-		return res
-
-	for key in data.keys():
-		res = formatOneEntry(key, res, data, structure, prefix, language, context, _rec)
+		return format
 
+	res = FormatTemplate.get(format, prefix or []).render(data, FormatTemplate.asDict(structure), language)
 	res = html5.utils.unescape(res) #all strings will be unescaped
 
 	return res
 
 
+class Logic(object):
+	"""
+	A logic expression compiled by the SafeEval interpreter, callable with the fields to evaluate it on.
+
+	Common node types are lowered into nested closures once, so evaluating the expression doesn't need
+	to dispatch on the syntax tree again. Any other node is left to the interpreter.
+	"""
+	binaryOperators = {
+		ast.Add: operator.add,
+		ast.Sub: operator.sub,
+		ast.Mult: operator.mul,
+		ast.Div: operator.truediv,
+		ast.Mod: operator.mod
+	}
+
+	unaryOperators = {
+		ast.Not: operator.not_,
+		ast.USub: operator.neg,
+		ast.UAdd: operator.pos
+	}
+
+	compareOperators = {
+		ast.Eq: operator.eq,
+		ast.NotEq: operator.ne,
+		ast.Lt: operator.lt,
+		ast.LtE: operator.le,
+		ast.Gt: operator.gt,
+		ast.GtE: operator.ge,
+		ast.In: lambda a, b: a in b,
+		ast.NotIn: lambda a, b: a not in b,
+		ast.Is: operator.is_,
+		ast.IsNot: operator.is_not
+	}
+
+	# Constant node types produced by the parser of Python < 3.8, mapped to the attribute holding their value
+	legacyConstants = {} if sys.version_info >= (3, 8) else {
+		ast.Num: "n",
+		ast.Str: "s",
+		ast.Bytes: "s",
+		ast.NameConstant: "value"
+	}
+
+	def __init__(self, source, node, interpreter):
+		self.source = source
+		self.node = node
+		self.interpreter = interpreter
+		self.evaluate = self.lower(node.body if isinstance(node, ast.Expression) else node)
+
+	def __call__(self, fields):
+		return self.evaluate(fields)
+
+	def dependencies(self):
+		"""
+		Determines the names of the fields the expression reads.
+
+		:return: Set of field names, or None when they can't be determined.
+		:rtype: set | None
+		"""
+		if not isinstance(self.node, ast.AST):
+			return None
+
+		return {node.id for node in ast.walk(self.node) if isinstance(node, ast.Name)}
+
+	def lower(self, node):
+		"""
+		Returns a function evaluating node on a dict of fields.
+		"""
+		if isinstance(node, ast.Constant):
+			value = node.value
+			return lambda fields: value
+
+		elif type(node) in self.legacyConstants:
+			value = getattr(node, self.legacyConstants[type(node)])
+			return lambda fields: value
+
+		elif isinstance(node, ast.Name):
+			# Unknown fields evaluate to None, like missing values of an entry
+			name = node.id
+			return lambda fields: fields.get(name)
+
+		elif isinstance(node, ast.BoolOp) and isinstance(node.op, (ast.And, ast.Or)):
+			values = [self.lower(value) for value in node.values]
+
+			if isinstance(node.op, ast.And):
+				def evaluate(fields):
+					for value in values:
+						res = value(fields)
+						if not res:
+							break
+
+					return res
+
+			else:
+				def evaluate(fields):
+					for value in values:
+						res = value(fields)
+						if res:
+							break
+
+					return res
+
+			return evaluate
+
+		elif isinstance(node, ast.UnaryOp) and type(node.op) in self.unaryOperators:
+			op = self.unaryOperators[type(node.op)]
+			operand = self.lower(node.operand)
+			return lambda fields: op(operand(fields))
+
+		elif isinstance(node, ast.BinOp) and type(node.op) in self.binaryOperators:
+			op = self.binaryOperators[type(node.op)]
+			left = self.lower(node.left)
+			right = self.lower(node.right)
+			return lambda fields: op(left(fields), right(fields))
+
+		elif isinstance(node, ast.Compare) and all([type(op) in self.compareOperators for op in node.ops]):
+			left = self.lower(node.left)
+			comparisons = [(self.compareOperators[type(op)], self.lower(comparator))
+			                    for op, comparator in zip(node.ops, node.comparators)]
+
+			def evaluate(fields):
+				value = left(fields)
+
+				for op, comparator in comparisons:
+					other = comparator(fields)
+					if not op(value, other):
+						return False
+
+					value = other
+
+				return True
+
+			return evaluate
+
+		elif isinstance(node, ast.IfExp):
+			test = self.lower(node.test)
+			body = self.lower(node.body)
+			orelse = self.lower(node.orelse)
+			return lambda fields: body(fields) if test(fields) else orelse(fields)
+
+		interpreter = self.interpreter
+		return lambda fields: interpreter.execute(node, fields)
+
+
+class LogicCache(object):
+	"""
+	Process-wide cache of compiled logic expressions, keyed by their source.
+
+	The least recently used expressions are dropped when the cache exceeds conf["logicCacheSize"].
+	Expressions failing to compile are cached as well, so they are reported only once.
+	"""
+	entries = OrderedDict()
+	hits = 0
+	misses = 0
+
+	@staticmethod
+	def get(source):
+		"""
+		Returns the compiled Logic for source, or None if it can't be compiled.
+		"""
+		if source in LogicCache.entries:
+			LogicCache.hits += 1
+			LogicCache.entries.move_to_end(source)
+			return LogicCache.entries[source]
+
+		LogicCache.misses += 1
+
+		interpreter = conf["safeEvalInterpreter"]
+		node = interpreter.compile(source)
+
+		if node is None:
+			html5.window.alert("ViUR logics: Parse error in >%s<" % source)
+			logic = None
+		else:
+			logic = Logic(source, node, interpreter)
+
+		LogicCache.entries[source] = logic
+
+		while len(LogicCache.entries) > conf["logicCacheSize"]:
+			LogicCache.entries.popitem(last=False)
+
+		return logic
+
+	@staticmethod
+	def stats():
+		"""
+		Returns a dict with the number of cached expressions, hits and misses.
+		"""
+		return {
+			"size": len(LogicCache.entries),
+			"hits": LogicCache.hits,
+			"misses": LogicCache.misses
+		}
+
+	@staticmethod
+	def clear():
+		LogicCache.entries.clear()
+		LogicCache.hits = LogicCache.misses = 0
+
+
+def compileLogics(structure, events):
+	"""
+	Compiles the logics of a skeleton structure for the given events, using the LogicCache.
+
+	:param structure: The skeleton structure, as list of (key, bone) tuples.
+	:param events: The logic events to compile, e.g. "logic.visibleIf".
+
+	:return: List of (key, event, logic, dependencies) tuples, in order of the structure.
+		dependencies is the set of fields read by the logic, or None when it has to be performed on any change.
+	:rtype: list
+	"""
+	logics = []
+
+	for key, desc in structure:
+		if not desc.get("params"):
+			continue
+
+		for event in events:
+			source = desc["params"].get(event)
+
+			if not source:
+				continue
+
+			logic = LogicCache.get(source)
+			if logic is None:
+				continue
+
+			logics.append((key, event, logic, logic.dependencies()))
+
+	return logics
+
+
 def getImagePreview(data, cropped = False, size = 150):
 	if conf["core.version"][0] == 3:
 		print(data["downloadUrl"])
@@ -280,7 +598,7 @@ class indexeddb():
 		print("READY 2")
 		dbResult = event.target.result
 		dbTransaction = event.target.result.transaction
-		for item in self.dbqueue:
+		for item in self.dbqueue[:]:
 			if item[0] == "createStore":
 				self._registerObjectStore(item, dbResult, dbTransaction)
 			elif item[0] == "deleteStore":
@@ -288,19 +606,25 @@ class indexeddb():
 			else:
 				print("UNDEFINED ACTION %s"%item[0])
 
+			self.dbqueue.remove(item)
+
 
 	def _processQueue(self,event):
 		print("READY")
 		dbResult = event.target.result
 		dbTransaction = event.target.result.transaction
 
-		for item in self.queue:
+		for item in self.queue[:]:
 			if item[0] == "add":
 				self._writeToStore(item,dbResult,dbTransaction)
+			elif item[0] == "put":
+				self._putToStore(item, dbResult, dbTransaction)
 			elif item[0] == "delete":
 				self._deleteFromStore(item, dbResult, dbTransaction)
 			elif item[0] == "edit":
 				self._updateToStore(item, dbResult, dbTransaction)
+			elif item[0] == "clear":
+				self._clearStore(item, dbResult, dbTransaction)
 			else:
 				print("UNDEFINED ACTION %s"%item[0])
 
@@ -318,6 +642,25 @@ class indexeddb():
 		else:
 			StoreHandler.add(obj)
 
+	def _putToStore(self,item,dbResult,dbTransaction):
+		name = item[1]
+		key = item[2]
+		obj = item[3]
+
+		trans = dbTransaction([name], "readwrite")
+		StoreHandler = trans.objectStore(name)
+		if key:
+			StoreHandler.put(obj, key)
+		else:
+			StoreHandler.put(obj)
+
+	def _clearStore(self,item,dbResult,dbTransaction):
+		name = item[1]
+
+		trans = dbTransaction([name], "readwrite")
+		StoreHandler = trans.objectStore(name)
+		StoreHandler.clear()
+
 	def _deleteFromStore(self,item,dbResult,dbTransaction):
 		name = item[1]
 		key = item[2]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from vi import html5
+
+from vi.network import NetworkService, DeferredCall
+from vi.config import conf
+from vi.i18n import translate
+
+
+class BulkDelete(html5.Progress):
+	"""
+		Deletes a list of entries with a bounded number of concurrent requests.
+
+		Instead of broadcasting a change for every single deleted entry,
+		one change notification is sent for the module when all requests are finished.
+		Progress is shown in the log, entries which could not be deleted are reported by their key.
+	"""
+
+	def __init__(self, module, entries, concurrency=None, *args, **kwargs):
+		"""
+			:param module: Name of the module to delete from
+			:type module: str
+			:param entries: List of (action, key) tuples, e.g. ("delete", key) or ("delete/node", key)
+			:type entries: list
+			:param concurrency: Number of requests running at the same time, defaults to conf["bulkConcurrency"]
+			:type concurrency: int
+		"""
+		super(BulkDelete, self).__init__()
+
+		self.module = module
+		self.pending = list(entries)
+		self.concurrency = max(1, concurrency or conf["bulkConcurrency"])
+		self.running = 0
+		self.succeeded = []
+		self.failed = []
+
+		self["max"] = len(self.pending)
+		self["value"] = 0
+
+		conf["mainWindow"].log("progress", self, icon="icons-delete")
+		self.parent().addClass("is-new")
+		self.parent().addClass("log-progress")
+		self.appendChild(html5.TextNode(translate("Deleting {amt} entries", amt=len(self.pending))))
+
+		DeferredCall(self.nextRequests)
+
+	def nextRequests(self):
+		while self.pending and self.running < self.concurrency:
+			action, key = self.pending.pop(0)
+			self.running += 1
+
+			req = NetworkService.request(self.module, action, {"key": key},
+			                             secure=True,
+			                             successHandler=self.onDeleteSuccess,
+			                             failureHandler=self.onDeleteFailure,
+			                             kickoff=False, priority="bulk")
+			req.deleteKey = key
+			req.kickoff()
+
+		if not self.running:
+			self.finish()
+
+	def onDeleteSuccess(self, req):
+		self.succeeded.append(req.deleteKey)
+		self.onDeleteFinished()
+
+	def onDeleteFailure(self, req, code):
+		self.failed.append((req.deleteKey, code))
+		conf["mainWindow"].log("error",
+		                       translate("Entry {key} could not be deleted (status: {code})", key=req.deleteKey, code=code),
+		                       modul=self.module, action="delete", key=req.deleteKey)
+		self.onDeleteFinished()
+
+	def onDeleteFinished(self):
+		self.running -= 1
+		self["value"] += 1
+		self.nextRequests()
+
+	def finish(self):
+		if self.succeeded:
+			# Give the index of the server time to catch up, like single modifying requests do
+			NetworkService.notifyChange(self.module, keys=self.succeeded, action="delete", _delay=2500)
+
+		if self.failed:
+			self.replaceWithMessage(
+				translate("{amt} entries deleted, {failed} failed", amt=len(self.succeeded), failed=len(self.failed)),
+				logClass="error"
+			)
+		else:
+			self.replaceWithMessage(translate("{amt} entries deleted", amt=len(self.succeeded)))
+
+	def replaceWithMessage(self, message, logClass="success"):
+		self.parent()["class"] = []
+		self.parent().addClass("log-%s" % logClass)
+
+		msg = html5.Span()
+		html5.utils.textToHtml(msg, message)
+
+		self.parent().appendChild(msg)
+		self.parent().removeChild(self)
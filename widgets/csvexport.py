@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 import datetime
 
-from vi import html5
+from js import Blob, URL
+
+from vi import html5, utils
 
 from vi.network import NetworkService, DeferredCall
 from vi.config import conf
@@ -11,6 +13,16 @@ from vi.framework.components.button import Button
 
 
 class ExportCsv(html5.Progress):
+	"""
+		Exports the entries of a list widget into a CSV file.
+
+		Every fetched page is converted into CSV lines right away and stored as a Blob,
+		so neither the entries nor the whole file are kept as Python objects.
+		The download is provided by an object URL to the concatenated Blobs.
+	"""
+
+	_latin1ToBytes = None # JS function converting a latin-1 string into a Uint8Array
+
 	def __init__(self, widget, selection, encoding = None, language = None,
 	                separator = None, lineSeparator = None, *args, **kwargs):
 		super(ExportCsv, self).__init__()
@@ -25,127 +37,235 @@ class ExportCsv(html5.Progress):
 		self.module = widget.module
 		self.params = self.widget.getFilter().copy()
 		self.params["limit"] = 99
-		self.data = []
 		self.structure = None
 		self.separator = separator or ";"
 		self.lineSeparator = lineSeparator or "\n"
 		self.encoding = encoding
 		self.lang = language
 
+		self.parts = html5.jseval("[]") # JS array of Blobs of the CSV lines converted so far
+		self.rows = 0 # Amount of exported rows
+		self.bytes = 0 # Size of the exported data
+		self.cellRenderer = {}
+		self.fields = []
+		self.cancelled = False
+		self.request = None # Request of the chunk currently loaded
+
 		conf["mainWindow"].log("progress", self, icon="icons-download-file")
 		self.parent().addClass("is-new")
 		self.parent().addClass("log-progress")
 		self.appendChild(html5.TextNode(translate("CSV-Export")))
 
+		self.status = html5.Span()
+		self.status.appendChild(html5.TextNode(translate("CSV-Export")))
+		self.parent().appendChild(self.status)
+
+		self.cancelBtn = Button(translate("Cancel"), self.cancel, icon="icons-cancel")
+		self.cancelBtn.addClass("btn--small")
+		self.parent().appendChild(self.cancelBtn)
+
 		DeferredCall(self.nextChunk)
 
 	def nextChunk(self, cursor = None):
 		if cursor:
 			self.params["cursor"] = cursor
 
-		NetworkService.request(self.module, "list", self.params,
-		                        successHandler=self.nextChunkComplete,
-		                        failureHandler=self.nextChunkFailure)
+		self.request = NetworkService.request(self.module, "list", self.params,
+		                                      successHandler=self.nextChunkComplete,
+		                                      failureHandler=self.nextChunkFailure,
+		                                      priority="bulk")
 
 	def nextChunkComplete(self, req):
-		answ = NetworkService.decode(req)
+		if self.cancelled:
+			return
+
+		# The structure is only needed with the first chunk, so convert what is used only
+		answ = NetworkService.decode(req, lazy=True)
 
 		if self.structure is None:
-			self.structure = answ["structure"]
+			if not answ["skellist"]:
+				self.replaceWithMessage(translate("No datasets to export."), logClass="info")
+				return
+
+			self.setStructure(answ["structure"])
 
 		if not answ["skellist"]:
 			self.exportToFile()
 			return
 
-		self.data.extend(answ["skellist"])
+		self.appendLines(answ["skellist"])
 		self.nextChunk(answ["cursor"])
 
-	def exportToFile(self):
-		if not self.data:
-			self.replaceWithMessage(translate("No datasets to export."), logClass="info")
-			return
-
-		assert self.structure
-
-		defaultLanguage = conf["currentLanguage"]
-		conf["currentLanguage"] = self.lang
-
-		# Visualize progress
-		self["max"] = len(self.data)
-		self["value"] = 0
-
-		cellRenderer = {}
-		struct = {k: v for k, v in self.structure}
-		fields = {}
+	def setStructure(self, structure):
+		"""
+			Determines the exported fields and writes the title line.
+		"""
+		self.structure = structure
+		self.struct = struct = {k: v for k, v in self.structure}
 		titles = []
 
-		idx = 0
 		for key, bone in self.structure:
-			print(key, bone)
 			#if bone["visible"] and ("params" not in bone or bone["params"] is None or "ignoreForCsvExport" not in bone[
 			#	"params"] or not bone["params"]["ignoreForCsvExport"]):
 			if bone["visible"]:
-				cellRenderer[key] = boneSelector.select(self.module, key, struct)
-				if cellRenderer[key]:
-					cellRenderer[key] = cellRenderer[key](self.module, key, struct)
-
-				fields[key] = idx
-				idx += 1
+				self.cellRenderer[key] = boneSelector.select(self.module, key, struct)
+				if self.cellRenderer[key]:
+					self.cellRenderer[key] = self.cellRenderer[key](self.module, key, struct)
 
+				self.fields.append(key)
 				titles.append(bone.get("descr", key) or key)
 
-		# Export
-		content = self.separator.join(titles) + self.lineSeparator
+		self.appendPart(self.separator.join([self.quote(x) for x in titles]) + self.lineSeparator)
+
+	def quote(self, value):
+		if any([x in value for x in [self.separator, "\"", "\n", "\r"]]):
+			return "\"%s\"" % value.replace("\"", "\"\"")
+
+		return value
+
+	def renderValue(self, key, value):
+		if value is None or str(value).lower() == "none":
+			return ""
+
+		renderer = self.cellRenderer.get(key)
+		if renderer is not None:
+			text = renderer.viewString(value)
+			if text is not None:
+				return text
+
+		return self.formatValue(self.struct[key], value)
+
+	def formatValue(self, bone, value, languages=True):
+		"""
+			Returns the text of 'value' of a bone without viewString(), formatted along
+			the bone structure like its view widget does.
+		"""
+		if value is None:
+			return ""
+
+		if languages and bone.get("languages") and isinstance(value, dict):
+			return self.formatValue(bone, value.get(self.lang), languages=False)
+
+		if isinstance(value, list):
+			return ", ".join([text for text in [self.formatValue(bone, x, languages=False) for x in value] if text])
 
-		for entry in self.data:
-			row = [None for _ in range(len(fields.keys()))]
+		if isinstance(value, dict):
+			if "dest" in value and bone.get("format"): # relational
+				text = utils.formatString(bone["format"], value["dest"], bone.get("relskel"),
+				                          prefix=["dest"], language=self.lang)
 
-			for key, value in entry.items():
-				print(key, value)
+				if bone.get("using") and value.get("rel"):
+					text = utils.formatString(text, value["rel"], bone["using"], prefix=["rel"], language=self.lang)
 
-				if key not in fields or value is None or str(value).lower() == "none":
-					continue
+				return text
 
-				try:
-					if cellRenderer[key] is not None:
-						row[fields[key]] = cellRenderer[key].toString(entry, key) #fixme: ViUR3
-					else:
-						row[fields[key]] = str(value)
+			if bone.get("format"): # record
+				return utils.formatString(bone["format"], value, bone.get("using"), language=self.lang)
 
-				except ValueError:
-					pass
+			return ", ".join([self.formatValue({}, x) for x in value.values() if x is not None])
 
-			content += self.separator.join(row) + self.lineSeparator
-			self["value"] += 1
+		return str(value)
+
+	def appendLines(self, skellist):
+		"""
+			Converts a page of entries into CSV lines and appends them as one Blob.
+		"""
+		defaultLanguage = conf["currentLanguage"]
+		conf["currentLanguage"] = self.lang
+
+		lines = []
+		for entry in skellist:
+			lines.append(self.separator.join([self.quote(self.renderValue(key, entry.get(key))) for key in self.fields]))
 
-		# Virtual File
 		conf["currentLanguage"] = defaultLanguage
 
-		a = html5.A()
-		a.hide()
-		self.appendChild(a)
+		lines.append("")
+		self.appendPart(self.lineSeparator.join(lines))
+
+		self.rows += len(skellist)
+		self.updateStatus()
+
+	def appendPart(self, text):
+		"""
+			Converts text into a Blob of the export encoding.
+
+			Only strings and JS objects are passed to JS, so the result doesn't depend on how
+			Python lists and bytes are proxied.
+		"""
+		parts = html5.jseval("[]")
 
 		if self.encoding == "utf-8":
-			encodeURIComponent = eval("encodeURIComponent")
-			a["href"] = "data:text/csv;charset=utf-8," + encodeURIComponent(content)
+			# Blobs encode strings as UTF-8
+			self.bytes += len(text.encode("utf-8"))
+			parts.push(text)
 		elif self.encoding == "iso-8859-15":
-			escape = eval("escape")
-			a["href"] = "data:text/csv;charset=ISO-8859-15," + escape(content)
+			# Each byte is passed as one character and copied into a Uint8Array by JS
+			part = text.encode("iso-8859-15", "replace")
+			self.bytes += len(part)
+			parts.push(ExportCsv.latin1ToBytes(part.decode("latin-1")))
 		else:
 			raise ValueError("unknown encoding: %s" % self.encoding)
 
+		self.parts.push(Blob.new(parts))
+
+	@staticmethod
+	def latin1ToBytes(text):
+		if ExportCsv._latin1ToBytes is None:
+			ExportCsv._latin1ToBytes = html5.jseval(
+				"(function(s) {"
+				"	var a = new Uint8Array(s.length);"
+				"	for(var i = 0; i < s.length; i++) a[i] = s.charCodeAt(i);"
+				"	return a;"
+				"})"
+			)
+
+		return ExportCsv._latin1ToBytes(text)
+
+	def updateStatus(self):
+		self.status.appendChild(
+			html5.TextNode(translate("{count} datasets, {size} kB", count=self.rows, size=self.bytes // 1024)),
+			replace=True
+		)
+
+	def cancel(self, *args, **kwargs):
+		self.cancelled = True
+		self.parts = None
+
+		if self.request:
+			self.request.abort()
+
+		self.replaceWithMessage(translate("CSV export cancelled"), logClass="info")
+
+	def exportToFile(self):
+		options = html5.jseval("({})")
+		options.type = "text/csv;charset=%s" % self.encoding
+
+		blob = Blob.new(self.parts, options)
+		url = URL.createObjectURL(blob)
+
+		a = html5.A()
+		a.hide()
+		self.appendChild(a)
+
 		filename = "export-%s-%s-%s-%s.csv" % (self.module, self.lang, self.encoding,
 		                                       datetime.datetime.now().strftime("%Y-%m-%d"))
+		a["href"] = url
 		a["download"] = filename
 		a.element.click()
 
+		# Release the data when the download has been started
+		DeferredCall(URL.revokeObjectURL, url, _delay=1000)
+
 		self.replaceWithMessage(translate("{count} datasets exported\nas {filename}",
-		                                    count=len(self.data), filename=filename))
+		                                    count=self.rows, filename=filename))
 
-		self.data = None
+		self.parts = None
 		self.structure = None
 
 	def nextChunkFailure(self, req, code):
+		if self.cancelled:
+			return
+
 		self.replaceWithMessage(translate("Error {code} on CSV export.", code=code), logClass="error")
 		self.widget.reloadData()
 
@@ -156,6 +276,8 @@ class ExportCsv(html5.Progress):
 		msg = html5.Span()
 		html5.utils.textToHtml(msg, message)
 
+		self.parent().removeChild(self.status)
+		self.parent().removeChild(self.cancelBtn)
 		self.parent().appendChild(msg)
 		self.parent().removeChild(self)
 
@@ -140,6 +140,7 @@ class EditWidget(html5.Div):
 		self.skelType = skelType
 		self.clone = clone
 		self.bones = {}
+		self.containers = {}
 		self.closeOnSuccess = False
 		self.logAction = logAction
 		self.sinkEvent("onChange")
@@ -148,6 +149,9 @@ class EditWidget(html5.Div):
 		self.views = {}
 
 		self._lastData = {} #Dict of structure and values received
+		self._logics = None # Compiled logics of the current structure
+		self._changedBones = set() # Keys of bones changed since logics were performed, None for all
+		self._logicsScheduled = False
 
 		if hashArgs:
 			self._hashArgs = parseHashParameters(hashArgs)
@@ -197,51 +201,99 @@ class EditWidget(html5.Div):
 		super(EditWidget, self).onAttach()
 		utils.setPreventUnloading(True)
 
-	def performLogics(self):
-		print("performLogics")
-		fields = self.serializeForDocument()
-
-		for key, desc in self.dataCache["structure"]:
-			if desc.get("params") and desc["params"]:
-				for event in ["logic.visibleIf", "logic.readonlyIf", "logic.evaluate", "logic.requiredIf"]: #add more here!
-					logic = desc["params"].get(event)
-
-					if not logic:
-						continue
-
-					# Compile logic at first run
-					if isinstance(logic, str):
-						desc["params"][event] = conf["safeEvalInterpreter"].compile(logic)
-						if desc["params"][event] is None:
-							alert("ViUR logics: Parse error in >%s<" % logic)
-							continue
-
-						logic = desc["params"][event]
-
-					res = conf["safeEvalInterpreter"].execute(logic, fields)
-
-					if event == "logic.evaluate":
-						self.bones[key].unserialize({key: res})
-					elif res:
-						if event == "logic.visibleIf":
-							self.containers[key].show()
-						elif event == "logic.readonlyIf":
-							self.containers[key].disable()
-						elif event == "logic.requiredIf":
-							self.bones[key].bone.required = True
-							self.bones[key].updateWidget()
-							self.updateWidgetLabel(key)
-						# add more here...
-					else:
-						if event == "logic.visibleIf":
-							self.containers[key].hide()
-						elif event == "logic.readonlyIf":
-							self.containers[key].enable()
-						elif event == "logic.requiredIf":
-							self.bones[key].bone.required = False
-							self.bones[key].updateWidget()
-							self.updateWidgetLabel(key)
-						# add more here...
+	def performLogics(self, changed=None):
+		"""
+		Performs the logics of the bones.
+
+		Only logics reading one of the changed bones are performed, and only the bones read by them are serialized.
+
+		:param changed: Keys of the changed bones, or None to perform all logics.
+		:type changed: set
+		"""
+		if self._logics is None:
+			self._logics = utils.compileLogics(
+				self.dataCache["structure"],
+				["logic.visibleIf", "logic.readonlyIf", "logic.evaluate", "logic.requiredIf"] #add more here!
+			)
+
+		if changed is not None:
+			changed = set(changed)
+
+		fields = self.serializeForDocument(set()) # Values not provided by bones
+		serialized = set()
+
+		for key, event, logic, dependencies in self._logics:
+			if changed is not None and dependencies is not None and not dependencies & changed:
+				continue
+
+			# Serialize only the bones read by this logic, once per run
+			needed = set(self.bones.keys()) if dependencies is None else dependencies & set(self.bones.keys())
+			if needed - serialized:
+				fields.update(self.serializeForDocument(needed - serialized))
+				serialized |= needed
+
+			res = logic(fields)
+
+			if event == "logic.evaluate":
+				self.bones[key].unserialize({key: res})
+
+				# Logics reading the evaluated bone are affected as well
+				serialized.discard(key)
+				if changed is not None:
+					changed.add(key)
+
+			elif res:
+				if event == "logic.visibleIf":
+					self.containers[key].show()
+				elif event == "logic.readonlyIf":
+					self.containers[key].disable()
+				elif event == "logic.requiredIf":
+					self.bones[key].bone.required = True
+					self.bones[key].updateWidget()
+					self.updateWidgetLabel(key)
+				# add more here...
+			else:
+				if event == "logic.visibleIf":
+					self.containers[key].hide()
+				elif event == "logic.readonlyIf":
+					self.containers[key].enable()
+				elif event == "logic.requiredIf":
+					self.bones[key].bone.required = False
+					self.bones[key].updateWidget()
+					self.updateWidgetLabel(key)
+				# add more here...
+
+	def scheduleLogics(self, key=None):
+		"""
+		Schedules the logics depending on the bone key to be performed; all logics if key is None.
+		Changes up to the next run are collected, so they are performed only once.
+		"""
+		if key is None:
+			self._changedBones = None
+		elif self._changedBones is not None:
+			self._changedBones.add(key)
+
+		if not self._logicsScheduled:
+			self._logicsScheduled = True
+			DeferredCall(self.performScheduledLogics)
+
+	def performScheduledLogics(self):
+		changed = self._changedBones
+		self._changedBones = set()
+		self._logicsScheduled = False
+
+		self.performLogics(changed)
+
+	def boneKeyFor(self, element=None, widget=None):
+		"""
+		Returns the key of the bone containing the given DOM element, or of the given bone widget.
+		"""
+		for key, container in self.containers.items():
+			if (widget is not None and self.bones.get(key) is widget) \
+				or (element is not None and container.element.contains(element)):
+				return key
+
+		return None
 
 	def updateWidgetLabel(self, key):
 		"""Reflects bone param changes also for its label if present
@@ -259,11 +311,11 @@ class EditWidget(html5.Div):
 
 	def onChange(self, event):
 		self.modified = True
-		DeferredCall(self.performLogics)
+		self.scheduleLogics(self.boneKeyFor(element=event.target))
 
 	def onBoneChange(self, bone):
 		self.modified = True
-		DeferredCall(self.performLogics)
+		self.scheduleLogics(self.boneKeyFor(widget=bone))
 
 	def showErrorMsg(self, req=None, code=None):
 		"""
@@ -442,6 +494,7 @@ class EditWidget(html5.Div):
 		self.desciptionLabels = {}
 		self.actionbar.resetLoadingState()
 		self.dataCache = data
+		self._logics = None
 		self.modified = False
 
 		tmpDict = {k: v for k, v in data["structure"]}
@@ -668,12 +721,17 @@ class EditWidget(html5.Div):
 
 		return res
 
-	def serializeForDocument(self):
+	def serializeForDocument(self, keys=None):
+		"""
+		Serializes the bones for evaluating logics.
+
+		:param keys: Keys of the bones to serialize, defaults to all bones.
+		"""
 		res = self._lastData.get("values", {})
 
-		for key, bone in self.bones.items():
+		for key in (self.bones.keys() if keys is None else keys):
 			try:
-				res[key] = bone.serialize()
+				res[key] = self.bones[key].serialize()
 			except InvalidBoneValueException as e:
 				res[key] = str(e)
 
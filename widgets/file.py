@@ -281,7 +281,7 @@ class Uploader(html5.ignite.Progress):
 		else:
 			self.uploadSuccess.fire(self, self.responseValue["values"])
 
-		NetworkService.notifyChange("file")
+		NetworkService.notifyChange("file", key=self.node, action="upload")
 		self.replaceWithMessage("Upload complete", isSuccess=True)
 
 	def onFailed(self, errorCode, *args, **kwargs):
@@ -342,8 +342,7 @@ class FileWidget(TreeBrowserWidget):
 		if not searchStr:
 			self.setRootNode(self.rootNode)
 		else:
-			for c in self.entryFrame._children[ : ]:
-				self.entryFrame.removeChild( c )
+			self.clearEntries()
 
 			for c in self.pathList._children[:]:
 				self.pathList.removeChild(c)
@@ -352,15 +351,15 @@ class FileWidget(TreeBrowserWidget):
 			self.pathList.appendChild(s)
 			self.loadNode(node = self.rootNode ,overrideParams = {"search": searchStr})
 
-	def getChildKey(self, widget):
+	def getEntryKey(self, skelType, data):
 		"""
 			Derives a string used to sort the entries on each level
 		"""
-		name = str(widget.data.get("name")).lower()
+		name = str(data.get("name")).lower()
 
-		if isinstance(widget, self.nodeWidget):
+		if skelType == "node":
 			return "0-%s" % name
-		elif isinstance(widget, self.leafWidget):
+		elif skelType == "leaf":
 			return "1-%s" % name
 		else:
 			return "2-"
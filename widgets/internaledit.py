@@ -6,6 +6,7 @@ from vi.priorityqueue import boneSelector
 from vi.exception import InvalidBoneValueException
 from vi.widgets.tooltip import ToolTip
 from vi.widgets.accordion import Accordion
+import vi.utils as utils
 
 class InternalEdit(html5.Div):
 
@@ -27,6 +28,10 @@ class InternalEdit(html5.Div):
 
 		self.accordion = None
 
+		self._logics = None # Compiled logics of the structure
+		self._changedBones = set() # Keys of bones changed since logics were performed, None for all
+		self._logicsScheduled = False
+
 		self.renderStructure(readOnly=readOnly)
 
 		if values:
@@ -154,12 +159,12 @@ class InternalEdit(html5.Div):
 
 		return res
 
-	def serializeForDocument(self):
+	def serializeForDocument(self, keys=None):
 		res = {}
 
-		for key, bone in self.bones.items():
+		for key in (self.bones.keys() if keys is None else keys):
 			try:
-				res[key] = bone.serialize()
+				res[key] = self.bones[key].serialize()
 			except InvalidBoneValueException as e:
 				res[key] = str(e)
 
@@ -186,48 +191,87 @@ class InternalEdit(html5.Div):
 		DeferredCall(self.performLogics)
 
 	def onChange(self, event):
-		DeferredCall(self.performLogics)
+		self.scheduleLogics(self.boneKeyFor(event.target))
 
 	def onKeyDown(self, event):
 		event.stopPropagation()
 
-	def performLogics(self):
-		fields = self.serializeForDocument()
-		#print("InternalEdit.performLogics", fields)
-
-		for key, desc in self.skelStructure:
-			if desc.get("params") and desc["params"]:
-				for event in ["logic.visibleIf", "logic.readonlyIf", "logic.evaluate"]: #add more here!
-					logic = desc["params"].get(event)
-
-					if not logic:
-						continue
-
-					# Compile logic at first run
-					if isinstance(logic, str):
-						desc["params"][event] = conf["safeEvalInterpreter"].compile(logic)
-						if desc["params"][event] is None:
-							alert("ViUR logics: Parse error in >%s<" % logic)
-							continue
-
-						logic = desc["params"][event]
-
-					res = conf["safeEvalInterpreter"].execute(logic, fields)
-
-					#print("InternalEdit.performLogics", event, key, res)
-
-					if event == "logic.evaluate":
-						self.bones[key].unserialize({key: res})
-					elif res:
-						if event == "logic.visibleIf":
-							self.containers[key].show()
-						elif event == "logic.readonlyIf":
-							self.containers[key].disable()
-
-						# add more here...
-					else:
-						if event == "logic.visibleIf":
-							self.containers[key].hide()
-						elif event == "logic.readonlyIf":
-							self.containers[key].enable()
-						# add more here...
+	def performLogics(self, changed=None):
+		"""
+		Performs the logics of the bones; see EditWidget.performLogics().
+		"""
+		if self._logics is None:
+			self._logics = utils.compileLogics(
+				self.skelStructure,
+				["logic.visibleIf", "logic.readonlyIf", "logic.evaluate"] #add more here!
+			)
+
+		if changed is not None:
+			changed = set(changed)
+
+		fields = self.serializeForDocument(set()) # Values not provided by bones
+		serialized = set()
+
+		for key, event, logic, dependencies in self._logics:
+			if changed is not None and dependencies is not None and not dependencies & changed:
+				continue
+
+			# Serialize only the bones read by this logic, once per run
+			needed = set(self.bones.keys()) if dependencies is None else dependencies & set(self.bones.keys())
+			if needed - serialized:
+				fields.update(self.serializeForDocument(needed - serialized))
+				serialized |= needed
+
+			res = logic(fields)
+
+			if event == "logic.evaluate":
+				self.bones[key].unserialize({key: res})
+
+				# Logics reading the evaluated bone are affected as well
+				serialized.discard(key)
+				if changed is not None:
+					changed.add(key)
+
+			elif res:
+				if event == "logic.visibleIf":
+					self.containers[key].show()
+				elif event == "logic.readonlyIf":
+					self.containers[key].disable()
+
+				# add more here...
+			else:
+				if event == "logic.visibleIf":
+					self.containers[key].hide()
+				elif event == "logic.readonlyIf":
+					self.containers[key].enable()
+				# add more here...
+
+	def scheduleLogics(self, key=None):
+		"""
+		Schedules the logics depending on the bone key to be performed; all logics if key is None.
+		"""
+		if key is None:
+			self._changedBones = None
+		elif self._changedBones is not None:
+			self._changedBones.add(key)
+
+		if not self._logicsScheduled:
+			self._logicsScheduled = True
+			DeferredCall(self.performScheduledLogics)
+
+	def performScheduledLogics(self):
+		changed = self._changedBones
+		self._changedBones = set()
+		self._logicsScheduled = False
+
+		self.performLogics(changed)
+
+	def boneKeyFor(self, element):
+		"""
+		Returns the key of the bone containing the given DOM element.
+		"""
+		for key, container in self.containers.items():
+			if container.element.contains(element):
+				return key
+
+		return None
@@ -6,7 +6,7 @@ from vi.i18n import translate
 from vi.network import NetworkService
 from vi.priorityqueue import boneSelector, moduleWidgetSelector
 from vi.widgets.sidebar import SideBar
-from vi.framework.components.datatable import DataTable, ViewportDataTable
+from vi.framework.components.datatable import DataTable, ViewportDataTable, VirtualDataTable
 from vi.framework.components.actionbar import ActionBar
 from vi.framework.event import EventDispatcher
 from vi.embedsvg import embedsvg
@@ -81,6 +81,9 @@ class ListWidget(html5.Div):
 		           and module in conf["modules"].keys()
 		           and "indexes" in conf["modules"][module].keys()
 		           and conf["modules"][module]["indexes"])
+		self._compact = (conf["modules"]
+		           and module in conf["modules"].keys()
+		           and conf["modules"][module].get("compactModel", conf["compactListModel"]))
 
 		self._currentCursor = None
 		self._structure = None
@@ -146,7 +149,8 @@ class ListWidget(html5.Div):
 		conf["mainWindow"].removeWidget(self)
 
 		if self.selectionCallback:
-			self.selectionCallback(self, self.getCurrentSelection())
+			callback = self.selectionCallback
+			self.requestFullRecords(self.getCurrentSelection(), lambda selection: callback(self, selection))
 
 	def tableInitialization(self,*args,**kwargs):
 		'''
@@ -156,7 +160,7 @@ class ListWidget(html5.Div):
 		:return:
 		'''
 
-		self.table = DataTable(checkboxes=self._checkboxes, indexes=self._indexes, *args, **kwargs)
+		self.table = DataTable(checkboxes=self._checkboxes, indexes=self._indexes, compact=self._compact, *args, **kwargs)
 		self.widgetContent.appendChild(self.table)
 		self.table.setDataProvider(self)
 
@@ -287,7 +291,7 @@ class ListWidget(html5.Div):
 
 			self._currentRequests.append(NetworkService.request(self.module, "list", filter,
 			                                successHandler=self.onCompletion, failureHandler=self.showErrorMsg,
-			                                cacheable=True ) )
+			                                cacheable=True, priority=self.batchPriority()))
 			self._currentCursor = None
 		else:
 			self.actionBar.resetLoadingState()
@@ -301,9 +305,19 @@ class ListWidget(html5.Div):
 
 	def onDetach(self):
 		self.isDetaching = True
+		self.abortRequests()
 		super(ListWidget, self).onDetach()
 		NetworkService.removeChangeListener( self )
 
+	def abortRequests(self):
+		"""
+			Cancels all running requests for data of this widget, as it won't be displayed.
+		"""
+		for req in self._currentRequests:
+			req.abort()
+
+		self._currentRequests = []
+
 	def onDataChanged(self, module, **kwargs):
 		"""
 			Refresh our view if element(s) in this module have changed
@@ -322,7 +336,7 @@ class ListWidget(html5.Div):
 		self.targetPage = 1
 		self.currentPage = 0
 		self._currentCursor = None
-		self._currentRequests = []
+		self.abortRequests()
 
 		filter = {}
 		if self.context:
@@ -335,7 +349,13 @@ class ListWidget(html5.Div):
 			NetworkService.request(self.module, "list", filter,
 			                        successHandler=self.onCompletion,
 			                        failureHandler=self.showErrorMsg,
-			                        cacheable=True))
+			                        cacheable=True, persistent=True, priority="visible"))
+
+	def batchPriority(self):
+		"""
+			Priority of requests for further batches; loading the entire list runs in background.
+		"""
+		return "bulk" if self.table._loadOnDisplay else "visible"
 
 	def setFilter(self, filter, filterID=None, filterDescr=None):
 		"""
@@ -434,6 +454,9 @@ class ListWidget(html5.Div):
 			self.table.setCellRender(boneName, boneFactory)
 			boneInfoList.append( boneInfo )
 
+		# A compact model only holds the former columns; rows must be fetched again
+		needsReload = self.table.getRowCount() and not self.table.providesFields(fields)
+
 		self.table.setShownFields( fields )
 
 		if conf["showBoneNames"]:
@@ -452,9 +475,67 @@ class ListWidget(html5.Div):
 		self.table.setCellRenders( rendersDict )
 		self._tableHeaderIsValid = True
 
+		if needsReload:
+			self.reloadData()
+
 	def getFields(self):
 		return self.columns[:]
 
+	def requestFullRecord(self, entry, callback, failureHandler=None):
+		"""
+			Calls 'callback' with the full record of 'entry'.
+
+			Entries of a compact model only contain the shown fields,
+			so the record is fetched from the server in this case.
+			If this fails, 'failureHandler' is called with the request and the error code,
+			by default the error is displayed instead of the list.
+		"""
+		if not entry.get("_compact"):
+			callback(entry)
+			return
+
+		def onRecordAvailable(req):
+			callback(NetworkService.decode(req)["values"])
+
+		NetworkService.request(self.module, "view/%s" % entry["key"],
+		                        successHandler=onRecordAvailable,
+		                        failureHandler=failureHandler or self.showErrorMsg,
+		                        cacheable=True, batchable=True)
+
+	def requestFullRecords(self, entries, callback):
+		"""
+			Calls 'callback' with the list of full records of 'entries', in the same order.
+
+			The records are requested batchable, so they are fetched by one request where the server
+			supports it. Records which can't be fetched are left out and reported as an error.
+		"""
+		records = [None] * len(entries)
+		state = {"missing": len(entries), "failed": 0}
+
+		if not entries:
+			callback(records)
+			return
+
+		def setRecord(idx, record):
+			records[idx] = record
+			state["missing"] -= 1
+
+			if state["missing"]:
+				return
+
+			if state["failed"]:
+				conf["mainWindow"].log("error", translate("{count} entries could not be loaded.", count=state["failed"]))
+
+			callback([record for record in records if record is not None])
+
+		def onRecordFailed(idx):
+			state["failed"] += 1
+			setRecord(idx, None)
+
+		for idx, entry in enumerate(entries):
+			self.requestFullRecord(entry, lambda record, idx=idx: setRecord(idx, record),
+			                       lambda req, code, idx=idx: onRecordFailed(idx))
+
 	def onSelectionActivated(self, table, selection):
 		self.activateSelection()
 
@@ -464,7 +545,7 @@ class ListWidget(html5.Div):
 			if self.selectionCallback:
 				self.selectorReturn()
 			else:
-				self.selectionActivatedEvent.fire(self, selection)
+				self.requestFullRecords(selection, lambda records: self.selectionActivatedEvent.fire(self, records))
 
 	@staticmethod
 	def canHandle(moduleName, moduleInfo):
@@ -487,6 +568,7 @@ class ViewportListWidget(ListWidget):
 		self.table = ViewportDataTable(rows=self._batchSize,
 		                               checkboxes=self._checkboxes,
 		                               indexes=self._indexes,
+		                               compact=self._compact,
 		                               *args, **kwargs)
 		self.widgetContent.appendChild(self.table)
 		self.table.setDataProvider(self)
@@ -564,3 +646,40 @@ class ViewportListWidget(ListWidget):
 
 moduleWidgetSelector.insert(10, ViewportListWidget.canHandle, ViewportListWidget)
 
+
+class VirtualListWidget(ListWidget):
+
+	def tableInitialization(self, *args, **kwargs):
+		'''
+		Instantiates the table
+		:param args: ListWidget Parameter
+		:param kwargs: ListWidget Parameter
+
+		Override explanation
+			- use VirtualDataTable, which only renders the rows inside the viewport
+			  and requests further batches while scrolling
+		'''
+		self.table = VirtualDataTable(checkboxes=self._checkboxes, indexes=self._indexes, compact=self._compact, *args, **kwargs)
+		self.widgetContent.appendChild(self.table)
+		self.table.setDataProvider(self)
+
+		# Proxy some events and functions of the original table
+		for f in ["selectionChangedEvent",
+		          "cursorMovedEvent",
+		          "tableChangedEvent",
+		          "getCurrentSelection",
+		          "requestingFinishedEvent"]:
+			setattr(self, f, getattr(self.table, f))
+
+		self.table.selectionActivatedEvent.register(self)
+		self.requestingFinishedEvent.register(self)
+
+		self.table["style"]["display"] = "none"
+
+	@staticmethod
+	def canHandle(moduleName, moduleInfo):
+		return moduleInfo["handler"] == "list.virtual" or moduleInfo["handler"].startswith("list.virtual.")
+
+
+moduleWidgetSelector.insert(10, VirtualListWidget.canHandle, VirtualListWidget)
+
@@ -138,7 +138,7 @@ class UserState(html5.Div):
 		if not user:
 			NetworkService.request( "user", "view/self",
 			                        successHandler=self.onCurrentUserAvailable,
-			                        cacheable=False )
+			                        cacheable=False, batchable=True )
 			return
 
 		aitem = html5.Div()
@@ -231,7 +231,7 @@ class Tasks(Button):
 		if not user:
 			NetworkService.request( "user", "view/self",
 			                        successHandler=self.onCurrentUserAvailable,
-			                        cacheable=False )
+			                        cacheable=False, batchable=True )
 			return
 
 		if "root" in user[ "access" ]:
@@ -274,4 +274,24 @@ class Logout(Button):
 
 toplevelActionSelector.insert(0, Logout.canHandle, Logout)
 
+
+class ClearCache(Button):
+	def __init__(self, *args, **kwargs):
+		super(ClearCache, self).__init__(icon="icons-reload", *args, **kwargs)
+		self.addClass("btn vi-tb-clearcache")
+		self["title"] = translate("Clear cache")
+		self.sinkEvent("onClick")
+
+	def onClick(self, event):
+		NetworkService.invalidateCache()
+		conf["mainWindow"].log("info", translate("Cache cleared"))
+		event.stopPropagation()
+		event.preventDefault()
+
+	@staticmethod
+	def canHandle(action):
+		return action == "clearcache"
+
+toplevelActionSelector.insert(0, ClearCache.canHandle, ClearCache)
+
 #FIXME: Put Message Center in Iconnav. The message center will be a popout in the topbar.
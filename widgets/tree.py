@@ -8,7 +8,7 @@ from vi.config import conf
 from vi.i18n import translate
 from vi.embedsvg import embedsvg
 from time import time
-import logging
+import bisect, logging
 
 
 class TreeItemWidget(html5.Li):
@@ -298,6 +298,18 @@ class TreeItemWidget(html5.Li):
 				size = convert_bytes(int(self.data["size"]))
 				self.nodeSubline.appendChild(html5.TextNode(size))
 
+	def updateData(self, data, structure):
+		"""
+			Replaces the displayed data, keeping the element and its children.
+		"""
+		self.data = data
+		self.structure = structure
+		self.sortindex = data["sortindex"] if "sortindex" in data else 0
+
+		self.nodeHeadline.removeAllChildren()
+		self.nodeSubline.removeAllChildren()
+		self.buildDescription()
+
 	def onClick(self, event):
 		if html5.utils.doesEventHitWidgetOrChildren(event, self.nodeToggle):
 			self.toggleExpand()
@@ -407,7 +419,7 @@ class TreeWidget(html5.Div):
 		self.appendChild(self.actionBar)
 
 		# Entry frame
-		self.entryFrame = html5.Ol()
+		self.entryFrame = self.createEntryFrame()
 		self.entryFrame.addClass("hierarchy")
 		self.appendChild(self.entryFrame)
 
@@ -415,6 +427,11 @@ class TreeWidget(html5.Div):
 		self._isCtrlPressed = False
 		self._expandedNodes = []
 		self._currentRequests = []
+		self._itemsByKey = {} # Map of key -> TreeItemWidget currently displayed
+		self._awaitingNodes = set() # Keys of nodes whose node children are requested but not received yet
+		self._deferredLeaves = {} # Map of node key -> leaf pages received before its node children
+		self._refreshing = {} # Map of node key -> state of a running refreshNode()
+		self._nodeCache = {} # Map of node key -> node data received so far, used to resolve paths
 		self.path = []
 
 		# Selection
@@ -441,6 +458,12 @@ class TreeWidget(html5.Div):
 				failureHandler=self.showErrorMsg
 			)
 
+	def createEntryFrame(self):
+		"""
+		Creates the element containing the top level items.
+		"""
+		return html5.Ol()
+
 	def setSelector(self, callback, multi=True, allow=None):
 		"""
 		Configures the widget as selector for a relationalBone and shows it.
@@ -559,7 +582,7 @@ class TreeWidget(html5.Div):
 		errorDiv.appendChild(html5.TextNode(txt))
 		self.appendChild(errorDiv)
 
-	def onDataChanged(self, module, **kwargs):
+	def onDataChanged(self, module, keys=None, actions=None, **kwargs):
 		if module != self.module:
 			isRootNode = False
 			for k, v in conf["modules"].items():
@@ -572,26 +595,233 @@ class TreeWidget(html5.Div):
 			if not isRootNode:
 				return
 
+		else:
+			if keys:
+				for key in keys:
+					self._nodeCache.pop(key, None)
+			else:
+				self._nodeCache = {}
+
+			nodes = self.affectedNodes(keys, actions)
+			if nodes is not None:
+				for node in nodes:
+					self.refreshNode(node)
+				return
+
 		self.actionBar.widgets["selectrootnode"].update()
 		self.reloadData()
 
+	def affectedNodes(self, keys, actions=None):
+		"""
+			Determines the nodes whose children must be fetched again after 'keys' changed.
+			Returns None if this can't be determined and everything must be reloaded.
+		"""
+		# Moved entries also appear elsewhere
+		if not keys or any(["move" in action for action in actions or []]):
+			return None
+
+		nodes = set()
+		for key in keys:
+			item = self.itemForKey(key)
+
+			if item is not None:
+				nodes.add(item.data["parententry"])
+
+				if item.childrenLoaded:
+					nodes.add(key)
+
+			elif self.olForNode(key) is not None:
+				nodes.add(key)
+
+			else:
+				return None
+
+		return nodes
+
+	def olForNode(self, node):
+		"""
+			Returns the element containing the children of 'node', or None if they are not displayed.
+		"""
+		item = self.itemForKey(node)
+		if item is not None:
+			return item.ol
+
+		if node in [self.rootNode, self.node]:
+			return self.entryFrame
+
+		return None
+
+	def refreshNode(self, node):
+		"""
+			Fetches the children of 'node' again and updates the displayed items in place.
+			Expanded items, selection and scroll position are kept.
+		"""
+		state = {"requests": [], "entries": []}
+		self._refreshing[node] = state
+
+		self.requestRefresh(node, "node", state)
+
+		if self.leafWidget:
+			self.requestRefresh(node, "leaf", state)
+
+	def requestRefresh(self, node, reqType, state, cursor=None):
+		params = {
+			"parententry": node,
+			"orderby": "sortindex",
+			"amount": 99
+		}
+
+		if cursor:
+			params["cursor"] = cursor
+
+		if self.context:
+			params.update(self.context)
+
+		r = NetworkService.request(self.module, "list/" + reqType, params,
+		                           successHandler=self.onRefreshSucceded,
+		                           failureHandler=self.onRefreshFailed,
+		                           priority="visible")
+		r.reqType = reqType
+		r.node = node
+		r.refreshState = state
+		state["requests"].append(r)
+
+	def onRefreshSucceded(self, req):
+		state = req.refreshState
+		if self._refreshing.get(req.node) is not state:
+			return # superseded
+
+		state["requests"].remove(req)
+		data = NetworkService.decode(req)
+
+		for skel in data["skellist"]:
+			state["entries"].append((req.reqType, skel, data["structure"]))
+
+		if data["skellist"] and data["cursor"]:
+			self.requestRefresh(req.node, req.reqType, state, data["cursor"])
+
+		if not state["requests"]:
+			del self._refreshing[req.node]
+			self.patchChildren(req.node, state["entries"])
+
+	def onRefreshFailed(self, req, code):
+		if self._refreshing.get(req.node) is req.refreshState:
+			self._refreshing = {}
+			self.reloadData()
+
+	def patchChildren(self, node, entries):
+		"""
+			Updates the displayed children of 'node' to 'entries', a list of (reqType, skel, structure).
+			Only changed items are touched in the DOM.
+		"""
+		ol = self.olForNode(node)
+		if ol is None:
+			return
+
+		existing = {c.data["key"]: c for c in ol._children if isinstance(c, TreeItemWidget)}
+		received = set()
+		items = []
+
+		for reqType, skel, structure in entries:
+			received.add(skel["key"])
+			item = existing.get(skel["key"])
+
+			if reqType == "node":
+				self._nodeCache[skel["key"]] = skel
+
+			if item is not None and item.skelType == reqType:
+				if item.data != skel:
+					sortKey = self.getChildKey(item)
+					item.updateData(skel, structure)
+
+					if self.getChildKey(item) != sortKey:
+						self.detachItem(item)
+						items.append(item)
+
+				continue
+
+			if item is not None:
+				self.removeItem(item)
+
+			if reqType == "leaf":
+				items.append(self.leafWidget(self.module, skel, structure, self))
+			else:
+				items.append(self.nodeWidget(self.module, skel, structure, self))
+
+		for key, item in existing.items():
+			if key not in received:
+				self.removeItem(item)
+
+		self.insertItems(ol, items)
+
+		for item in items:
+			self.registerItem(item)
+
+		if ol != self.entryFrame:
+			if ol._children:
+				ol.parent().removeClass("has-no-child")
+			else:
+				ol.parent().addClass("has-no-child")
+
+	def detachItem(self, item):
+		"""
+			Removes 'item' from its parent element, keeping it registered.
+		"""
+		ol = item.parent()
+		keys = getattr(ol, "sortKeys", None)
+
+		if keys is not None:
+			del keys[ol._children.index(item)]
+
+		ol.removeChild(item)
+
+	def removeItem(self, item):
+		"""
+			Removes 'item' and everything below it.
+		"""
+		self.detachItem(item)
+		self.unregisterItem(item)
+
+		if item in self.selection:
+			self.selection.remove(item)
+			self.selectionChangedEvent.fire(self, self.selection)
+
 	def onAttach(self):
 		super(TreeWidget, self).onAttach()
 		NetworkService.registerChangeListener(self)
 
 	def onDetach(self):
+		self.abortRequests()
 		super(TreeWidget, self).onDetach()
 		NetworkService.removeChangeListener(self)
 
+	def abortRequests(self):
+		"""
+			Cancels all running requests for data of this widget, as it won't be displayed.
+		"""
+		for req in self._currentRequests:
+			req.abort()
+
+		for state in self._refreshing.values():
+			for req in state["requests"]:
+				req.abort()
+
+		self._currentRequests = []
+		self._refreshing = {}
+		self._awaitingNodes = set()
+		self._deferredLeaves = {}
+
 	def itemForKey(self, key, elem=None):
 		"""
 			Returns the HierarchyWidget displaying the entry with the given key.
 			:param key: The key (id) of the item.
 			:type key: str
+			:param elem: Only search below this element; by default, the registry of all items is used.
 			:returns: HierarchyItem
 		"""
 		if elem is None:
-			elem = self.entryFrame
+			return self._itemsByKey.get(key)
+
 		for child in elem._children:
 			if child.data["key"] == key:
 				return (child)
@@ -625,38 +855,88 @@ class TreeWidget(html5.Div):
 			self.nodeChangedEvent.fire(node)
 		self.reloadData()
 
-	def reloadData(self):
+	def registerItem(self, item):
 		"""
-			Reload the data were displaying.
+			Adds 'item' to the registry used by itemForKey().
 		"""
+		self._itemsByKey[item.data["key"]] = item
 
-		def collectExpandedNodes(currNode):
-			res = []
-			for c in currNode.children():
-				if isinstance(c, TreeItemWidget):
-					if c.isExpanded:
-						res.append(c.data["key"])
-
-					res.extend(collectExpandedNodes(c.ol))
+	def unregisterItem(self, item):
+		"""
+			Removes 'item' and all items below it from the registry.
+		"""
+		if self._itemsByKey.get(item.data["key"]) is item:
+			del self._itemsByKey[item.data["key"]]
 
-			return res
+		for child in item.ol._children:
+			if isinstance(child, TreeItemWidget):
+				self.unregisterItem(child)
 
-		self._expandedNodes = collectExpandedNodes(self.entryFrame)
-		self._currentRequests = []
+	def clearEntries(self):
+		"""
+			Removes all displayed items.
+		"""
 		self.entryFrame.removeAllChildren()
+		self.entryFrame.sortKeys = []
+		self._itemsByKey = {}
+
+	def insertItems(self, ol, items):
+		"""
+			Inserts 'items' into 'ol', keeping all children ordered by getChildKey().
+
+			The sort keys of the children are kept along with 'ol', so every item is placed
+			by a binary search and existing children are never moved.
+		"""
+		keys = getattr(ol, "sortKeys", None)
+		if keys is None:
+			keys = ol.sortKeys = [self.getChildKey(c) for c in ol._children]
+
+		items = sorted([(self.getChildKey(item), item) for item in items], key=lambda x: x[0])
+
+		for key, item in items:
+			pos = bisect.bisect_right(keys, key)
+
+			if pos < len(keys):
+				ol.insertBefore(item, ol._children[pos])
+			else:
+				ol.appendChild(item)
+
+			keys.insert(pos, key)
+
+	def collectExpandedNodes(self):
+		"""
+			Returns the keys of all expanded items.
+		"""
+		return [key for key, item in self._itemsByKey.items() if item.isExpanded]
+
+	def reloadData(self):
+		"""
+			Reload the data were displaying.
+		"""
+		self._expandedNodes = self.collectExpandedNodes()
+		self.abortRequests()
+		self.clearEntries()
 
 		self.loadNode(self.rootNode)
 
-	def loadNode(self, node, cursor=None, overrideParams=None, reqType=None):
+	def loadNode(self, node, cursor=None, overrideParams=None, reqType=None, priority="visible"):
 		"""
 			Fetch the (direct) children of the given node.
 			Once the list is received, append them to their parent node.
+
+			Without a reqType, nodes and leaves are requested in parallel.
+			Leaves are displayed when the first page of nodes has been displayed.
 			:param node: Key of the node to fetch
 			:type node: str
+			:param priority: Priority class of the request, see NetworkService.request
+			:type priority: str
 		"""
 		self.node = node
 
 		if reqType is None:
+			if self.leafWidget:
+				self._awaitingNodes.add(node)
+
 			self.loadNode(node, cursor, overrideParams, "node")
 
 			if self.leafWidget:
@@ -681,7 +961,8 @@ class TreeWidget(html5.Div):
 		r = NetworkService.request(self.module, "list/" + reqType,
 		                           params,
 		                           successHandler=self.onRequestSucceded,
-		                           failureHandler=self.showErrorMsg)
+		                           failureHandler=self.onRequestFailed,
+		                           priority=priority)
 		r.reqType = reqType
 		r.node = node
 		self._currentRequests.append(r)
@@ -700,35 +981,80 @@ class TreeWidget(html5.Div):
 		self._currentRequests.remove(req)
 		data = NetworkService.decode(req)
 
-		if req.node == self.rootNode:
-			ol = self.entryFrame
-		else:
-			tmp = self.itemForKey(req.node)
-			if not tmp:
-				ol = self.entryFrame
-			else:
-				ol = tmp.ol
+		if data["skellist"] and data["cursor"]:
+			self.requestNextPage(req, data["cursor"])
+
+		if req.reqType == "leaf" and req.node in self._awaitingNodes:
+			self._deferredLeaves.setdefault(req.node, []).append(data)
+			return
+
+		self.renderChildren(req.node, req.reqType, data)
+
+		if req.reqType == "node" and req.node in self._awaitingNodes:
+			self._awaitingNodes.remove(req.node)
+
+			for leafData in self._deferredLeaves.pop(req.node, []):
+				self.renderChildren(req.node, "leaf", leafData)
+
+		self.actionBar.resetLoadingState()
+
+	def onRequestFailed(self, req, code):
+		"""
+			The NetworkRequest for a (sub)node failed.
+			Leaves held back for the node children of that node are displayed anyway.
+		"""
+		if not req in self._currentRequests:
+			return
+
+		self._currentRequests.remove(req)
+
+		if req.reqType == "node" and req.node in self._awaitingNodes:
+			self._awaitingNodes.remove(req.node)
+
+			for leafData in self._deferredLeaves.pop(req.node, []):
+				self.renderChildren(req.node, "leaf", leafData)
+
+		self.actionBar.resetLoadingState()
+		self.showErrorMsg(req, code)
+
+	def requestNextPage(self, req, cursor):
+		"""
+			Requests the page following the one of 'req'.
+			This is done right away, so the next page is loaded while the current one is displayed.
+		"""
+		self.loadNode(req.node, cursor, reqType=req.reqType, priority="prefetch")
+
+	def renderChildren(self, node, reqType, data):
+		"""
+			Creates the items for a received page of children of 'node' and inserts them.
+		"""
+		ol = self.olForNode(node) or self.entryFrame
 
+		items = []
 		for skel in data["skellist"]:
-			if req.reqType == "leaf":
+			if reqType == "leaf":
 				hi = self.leafWidget(self.module, skel, data["structure"], self)
 			else:
 				hi = self.nodeWidget(self.module, skel, data["structure"], self)
-			ol.appendChild(hi)
+				self._nodeCache[skel["key"]] = skel
+
+			items.append(hi)
+
+		self.insertItems(ol, items)
+
+		for hi in items:
+			self.registerItem(hi)
 			if hi.data["key"] in self._expandedNodes:
 				hi.toggleExpand()
 				if not hi.childrenLoaded:
 					hi.childrenLoaded = True
 					self.loadNode(hi.data["key"])
-		ol.sortChildren(self.getChildKey)
-
-		if not ol._children and ol != self.entryFrame:
-			ol.parent().addClass("has-no-child")
 
-		if data["skellist"] and data["cursor"]:
-			self.loadNode(req.node, data["cursor"], reqType=req.reqType)
-
-		self.actionBar.resetLoadingState()
+		if ol != self.entryFrame:
+			if ol._children:
+				ol.parent().removeClass("has-no-child")
+			else:
+				ol.parent().addClass("has-no-child")
 
 	def onDrop(self, event):
 		"""
@@ -753,7 +1079,13 @@ class TreeWidget(html5.Div):
 		"""
 			Order by sortindex
 		"""
-		name = float(widget.data.get("sortindex") or 0)
+		return self.getEntryKey(widget.skelType, widget.data)
+
+	def getEntryKey(self, skelType, data):
+		"""
+			Returns the key to order entries of the given skelType and data on each level.
+		"""
+		name = float(data.get("sortindex") or 0)
 		return name
 
 	@staticmethod
@@ -792,11 +1124,167 @@ class BreadcrumbNodeWidget(TreeNodeWidget):
 # self.EntryIcon()
 
 
+class VirtualTreeLevel(html5.Ol):
+	"""
+		Entry frame of a TreeBrowserWidget, rendering only the items inside the visible viewport.
+
+		The entries of the level are kept as data in sort order. Items are only created for the
+		entries around the scroll position, plus an overscan; all items share the same height,
+		which maps the scroll position directly onto an entry. Further leaf pages are requested
+		when scrolling reaches the end of the loaded entries.
+	"""
+	itemHeight = 40 # Height of every item in pixels
+	overscan = 10 # Items rendered above and below the visible items
+
+	def __init__(self, widget, *args, **kwargs):
+		super(VirtualTreeLevel, self).__init__(*args, **kwargs)
+		self.addClass("hierarchy--virtual")
+		self["style"]["overflow-y"] = "auto"
+
+		self.widget = widget
+		self.entries = [] # List of (reqType, skel, structure), in sort order
+		self.entryKeys = [] # Sort keys of entries
+		self.keys = set() # Keys of all entries
+		self.items = {} # Map of key -> item currently rendered
+		self.nextPage = None # (node, cursor) of the next leaf page, requested on demand
+		self.window = None # (start, end, amount of entries) the items were rendered for
+
+		self.sinkEvent("onScroll")
+
+	def __contains__(self, key):
+		return key in self.keys
+
+	def clear(self):
+		self.entries = []
+		self.entryKeys = []
+		self.keys = set()
+		self.items = {}
+		self.nextPage = None
+		self.window = None
+		self.removeAllChildren()
+
+	def addEntries(self, reqType, skellist, structure):
+		for skel in skellist:
+			key = self.widget.getEntryKey(reqType, skel)
+			pos = bisect.bisect_right(self.entryKeys, key)
+
+			self.entryKeys.insert(pos, key)
+			self.entries.insert(pos, (reqType, skel, structure))
+			self.keys.add(skel["key"])
+
+		self.renderWindow(force=True)
+
+	def setEntries(self, entries):
+		"""
+			Replaces all entries, e.g. after refreshing the level. Items of unchanged entries are kept.
+		"""
+		self.entries = []
+		self.entryKeys = []
+		self.keys = set()
+
+		for reqType, skel, structure in entries:
+			key = self.widget.getEntryKey(reqType, skel)
+			pos = bisect.bisect_right(self.entryKeys, key)
+
+			self.entryKeys.insert(pos, key)
+			self.entries.insert(pos, (reqType, skel, structure))
+			self.keys.add(skel["key"])
+
+		self.renderWindow(force=True)
+
+	def updateItems(self, start, end):
+		"""
+			Makes the children the items of the entries from start to end, keeping the items already shown.
+		"""
+		selected = {item.data["key"]: item for item in self.widget.selection}
+		items = {}
+		order = []
+
+		for reqType, skel, structure in self.entries[start:end]:
+			item = self.items.get(skel["key"]) or selected.get(skel["key"])
+
+			if item is None or item.skelType != reqType:
+				if reqType == "leaf":
+					item = self.widget.leafWidget(self.widget.module, skel, structure, self.widget)
+				else:
+					item = self.widget.nodeWidget(self.widget.module, skel, structure, self.widget)
+
+				item["style"]["height"] = "%dpx" % self.itemHeight
+
+			elif item.data is not skel:
+				item.updateData(skel, structure)
+
+			if skel["key"] in selected:
+				item.addClass("is-focused")
+
+			if self.items.get(skel["key"]) is not item:
+				self.widget.registerItem(item)
+
+			items[skel["key"]] = item
+			order.append(item)
+
+		# Remove the items which left the window
+		shown = {id(item) for item in order}
+
+		for child in self._children[:]:
+			if id(child) not in shown:
+				self.removeChild(child)
+
+		for key, item in self.items.items():
+			if items.get(key) is not item and key not in selected:
+				self.widget.unregisterItem(item)
+
+		# Insert the items which entered the window at their position
+		for idx, item in enumerate(order):
+			children = self._children
+
+			if idx < len(children) and children[idx] is item:
+				continue
+
+			if item.parent() is self:
+				self.removeChild(item)
+
+			if idx < len(self._children):
+				self.insertBefore(item, self._children[idx])
+			else:
+				self.appendChild(item)
+
+		self.items = items
+
+		self["style"]["padding-top"] = "%dpx" % (start * self.itemHeight)
+		self["style"]["padding-bottom"] = "%dpx" % ((len(self.entries) - end) * self.itemHeight)
+
+	def renderWindow(self, force=False):
+		"""
+			Shows the items of the entries around the scroll position.
+
+			Without force, nothing is done as long as the window covers the same entries. Otherwise only
+			the items entering or leaving the window are inserted or removed.
+		"""
+		height = self.element.clientHeight or html5.window.innerHeight
+		first = int(self.element.scrollTop // self.itemHeight)
+		start = max(0, first - self.overscan)
+		end = min(len(self.entries), first + int(height // self.itemHeight) + 1 + self.overscan)
+
+		if force or self.window != (start, end, len(self.entries)):
+			self.window = (start, end, len(self.entries))
+			self.updateItems(start, end)
+
+		if self.nextPage and end + self.overscan >= len(self.entries):
+			node, cursor = self.nextPage
+			self.nextPage = None
+			self.widget.loadNode(node, cursor, reqType="leaf")
+
+	def onScroll(self, event):
+		self.renderWindow()
+
+
 class TreeBrowserWidget(TreeWidget):
 	leafWidget = BrowserLeafWidget
 	nodeWidget = BrowserNodeWidget
 
 	def __init__(self, module, rootNode=None, node=None, context=None, *args, **kwargs):
+		self._pathRequest = None
 		super(TreeBrowserWidget, self).__init__(module, rootNode, node, context, *args, **kwargs)
 
 		# Breadcrumb (bröselige Bröselbrotbrösel, oder was damit sonst auch immer gemeint sein soll...)
@@ -804,45 +1292,140 @@ class TreeBrowserWidget(TreeWidget):
 		self.pathList.addClass("vi-tree-breadcrumb")
 		self.insertBefore(self.pathList, self.entryFrame)
 
+	def createEntryFrame(self):
+		moduleInfo = conf["modules"].get(self.module) or {}
+
+		if moduleInfo.get("virtualTree", conf["virtualTreeLevels"]):
+			return VirtualTreeLevel(self)
+
+		return super().createEntryFrame()
+
+	def isVirtual(self):
+		return isinstance(self.entryFrame, VirtualTreeLevel)
+
+	def clearEntries(self):
+		if not self.isVirtual():
+			super().clearEntries()
+			return
+
+		self.entryFrame.clear()
+		self._itemsByKey = {}
+
+	def requestNextPage(self, req, cursor):
+		# Leaves of a virtual level are requested when scrolling reaches them
+		if self.isVirtual() and req.reqType == "leaf" and self.olForNode(req.node) is self.entryFrame:
+			self.entryFrame.nextPage = (req.node, cursor)
+			self.entryFrame.renderWindow()
+			return
+
+		super().requestNextPage(req, cursor)
+
+	def renderChildren(self, node, reqType, data):
+		if not self.isVirtual() or (self.olForNode(node) or self.entryFrame) is not self.entryFrame:
+			super().renderChildren(node, reqType, data)
+			return
+
+		if reqType == "node":
+			for skel in data["skellist"]:
+				self._nodeCache[skel["key"]] = skel
+
+		self.entryFrame.addEntries(reqType, data["skellist"], data["structure"])
+
+	def patchChildren(self, node, entries):
+		if not self.isVirtual() or self.olForNode(node) is not self.entryFrame:
+			super().patchChildren(node, entries)
+			return
+
+		for reqType, skel, structure in entries:
+			if reqType == "node":
+				self._nodeCache[skel["key"]] = skel
+
+		self.entryFrame.setEntries(entries)
+
+	def affectedNodes(self, keys, actions=None):
+		# Entries of a virtual level are mostly not rendered, but known by the level
+		if (self.isVirtual() and keys and not any(["move" in action for action in actions or []])
+				and all([key in self.entryFrame for key in keys])):
+			return {self.node}
+
+		return super().affectedNodes(keys, actions)
+
 	def reloadData(self):
 		super().reloadData()
 		self.rebuildPath()
 
+	def abortRequests(self):
+		super().abortRequests()
+
+		if self._pathRequest:
+			self._pathRequest.abort()
+			self._pathRequest = None
+
 	def rebuildPath(self):
 		"""
 			Rebuild the displayed path-list.
 		"""
 		self.pathList.removeAllChildren()
 
-		NetworkService.request(
-			self.module, "view/node/%s" % self.node,
-			successHandler=self.onPathRequestSucceded
-		)
+		if self._pathRequest:
+			self._pathRequest.abort()
+			self._pathRequest = None
+		self.resolvePath(self.node, [])
+
+	def resolvePath(self, key, path):
+		"""
+			Collects the ancestors of 'key' into 'path', starting with 'key' itself.
+
+			Nodes are taken from the node cache; only a node not known yet is requested,
+			afterwards resolving continues in onPathRequestSucceded.
+		"""
+		while key and key != self.rootNode:
+			skel = self._nodeCache.get(key)
+
+			if skel is None:
+				self._pathRequest = NetworkService.request(
+					self.module, "view/node/%s" % key,
+					successHandler=self.onPathRequestSucceded,
+					batchable=True
+				)
+				self._pathRequest.path = path
+				return
+
+			if not skel["parententry"] or skel["parententry"] == skel["key"]:
+				break
+
+			path.append(skel)
+			key = skel["parententry"]
+
+		self.showPath(path)
 
 	def onPathRequestSucceded(self, req):
 		"""
 			Rebuild the displayed path-list according to request data
 		"""
-		answ = NetworkService.decode(req)
-		skel = answ["values"]
+		if req is not self._pathRequest:
+			return # superseded
 
-		if skel["parententry"] and skel["parententry"] != skel["key"]:
-			c = BreadcrumbNodeWidget(self.module, skel, [], self)
+		skel = NetworkService.decode(req)["values"]
+		self._nodeCache[skel["key"]] = skel
+		self.resolvePath(skel["key"], req.path)
 
-			NetworkService.request(
-				self.module, "view/node/%s" % skel["parententry"],
-				successHandler=self.onPathRequestSucceded
-			)
+	def showPath(self, path):
+		"""
+			Displays the path-list, 'path' contains the nodes from the current one up to the root.
+		"""
+		self.pathList.removeAllChildren()
 
-		else:
-			c = BreadcrumbNodeWidget(self.module, {"key": self.rootNode, "name": "root"}, [], self)
-			c.addClass("is-rootnode")
+		c = BreadcrumbNodeWidget(self.module, {"key": self.rootNode, "name": "root"}, [], self)
+		c.addClass("is-rootnode")
+		self.pathList.appendChild(c)
 
-		self.pathList.prependChild(c)
+		for skel in reversed(path):
+			self.pathList.appendChild(BreadcrumbNodeWidget(self.module, skel, [], self))
 
 	def activateSelection(self, element):
 		if isinstance(element, TreeNodeWidget):
-			self.entryFrame.removeAllChildren()
+			self.clearEntries()
 			self.loadNode(element.data["key"])
 			self.rebuildPath()
 		else:
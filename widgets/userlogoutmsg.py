@@ -67,7 +67,7 @@ class UserLogoutMsg(html5.ext.Popup):
 		NetworkService.request("user", "view/self",
 		                       successHandler=self.onUserTestSuccess,
 		                       failureHandler=self.onUserTestFail,
-		                       cacheable=False)
+		                       cacheable=False, batchable=True)
 
 	def onUserTestSuccess(self, req):
 		"""